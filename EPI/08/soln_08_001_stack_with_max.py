@@ -30,34 +30,39 @@ class MaxStack(object):
 
     # The idea is this:  When we push a new element x onto the stack,
     # it could be the new maximum element, so we must compute a new
-    # whole-stack maximum, call it y.  This we store with x as the
-    # pair (x, y) for instant access.  Under this scheme, the current
-    # whole-stack maximum will always be the top y value on the stack.
+    # whole-stack maximum, call it y.  This we store alongside x, on a
+    # parallel stack of maxima, for instant access.  Under this scheme,
+    # the current whole-stack maximum will always be the top y value.
     # All operations preserve this invariant.  Thus computing the new
     # whole-stack maximum is just new_y = max(x, prev_y), an O(1)-time
     # operation.  Later, when we need to find the whole-stack maximum,
     # we can just return the top y value.  When elements x are popped,
     # their corresponding y values are removed, as well, restoring the
     # stack to a previous state in which the invariant held and thus
-    # still holds.
+    # still holds.  (Keeping the x and y values on parallel stacks,
+    # rather than as a stack of pairs, saves allocating a tuple per
+    # push.)
 
     def __init__(self):
         self.stack = []
+        self.stack_maxes = []
 
     def __len__(self):
         return len(self.stack)
 
     def push(self, x):
         stack_max = x if not self else max(x, self.max())
-        self.stack.append((x, stack_max))
+        self.stack.append(x)
+        self.stack_maxes.append(stack_max)
 
     def pop(self):
         self._require_nonempty()
-        return self.stack.pop()[0]  # return x, discard stack_max
+        self.stack_maxes.pop()
+        return self.stack.pop()
 
     def max(self):
         self._require_nonempty()
-        return self.stack[-1][1]  # return top stack_max value
+        return self.stack_maxes[-1]  # return top stack_max value
 
     def _require_nonempty(self):
         if not self:
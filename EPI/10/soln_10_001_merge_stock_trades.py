@@ -59,11 +59,29 @@ operations over this heap, each of time O(log M), resulting in an
 overall run time of O(N * log M).
 
 
+Faster merging.  For merging big files, the merge_files function
+does better in three ways.  First, it reads its inputs in large blocks
+of lines (see merge_sorted_blocks) instead of line by line.  Second,
+when a stream wins twice in a row, suggesting that its values come in
+a run, as trades in logs often do, it finds the runner-up stream --
+one of the heap root's two children -- and then emits, with one
+bisection and one slice, every value in the winner's block that comes
+before the runner-up's next value.  Values in long runs are thus never
+compared at all.  Third, it writes its output in batches of lines.
+
+(A loser tree, which replays one comparison per level when the winning
+stream advances, instead of a heap pop and push, needs fewer
+comparisons, but in Python a loser tree runs several times slower than
+the heapq module's C heap operations.)
+
+
 Refs:  [1]  http://blog.moertel.com/posts/2013-05-26-python-lazy-merge.html
 
 """
 
-from heapq import heapify, heappop, heappush
+import contextlib
+from bisect import bisect_left, bisect_right
+from heapq import heapify, heappop, heappush, heapreplace
 
 
 def merge_iters(iters):
@@ -101,12 +119,75 @@ def stream_next(stream):
     return x, iter_to_stream(iter)
 
 
+# Merging of blocks.
+
+
+def merge_sorted_blocks(block_iters, batch_size=2**16):
+    """Merge sorted iterators over blocks (lists) of values into batches.
+
+    Each iterator must yield non-empty lists whose concatenation is sorted.
+    Yields lists of at least batch_size values (but the last), which when
+    concatenated hold the merged values.  Ties go to the earlier iterator,
+    as in a stable sort.
+
+    """
+    block_iters = list(map(iter, block_iters))
+    blocks = [next(it, None) for it in block_iters]
+    # heap entry = [next value, iterator index, position in its block]
+    heap = [[block[0], i, 0] for i, block in enumerate(blocks) if block]
+    heapify(heap)
+    batch = []
+    last = None  # the previous winner
+    while heap:
+        top = heap[0]
+        _, w, start = top
+        block = blocks[w]
+        if top is last:
+            # Emit w's run: the values in its block before the runner-up's.
+            if len(heap) == 1:
+                end = len(block)
+            else:
+                y, r, _ = heap[1] if len(heap) == 2 or heap[1] < heap[2] else heap[2]
+                end = (bisect_left if r < w else bisect_right)(block, y, start)
+            batch += block[start:end]
+        else:
+            batch.append(block[start])
+            end = start + 1
+        last = top
+        if end == len(block):
+            block = blocks[w] = next(block_iters[w], None)
+            if block is None:
+                heappop(heap)
+                continue
+            end = 0
+        top[0], top[2] = block[end], end
+        heapreplace(heap, top)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def merge_files(infiles, outfile, block_size=2**18, batch_size=2**16):
+    """Merge the sorted lines of the files infiles into the file outfile.
+
+    The inputs are read, as bytes, in blocks of about block_size bytes
+    each, and the output written in batches of at least batch_size lines.
+
+    """
+    with contextlib.ExitStack() as stack:
+        files = [stack.enter_context(open(name, "rb")) for name in infiles]
+        block_iters = [iter(lambda f=f: f.readlines(block_size), []) for f in files]
+        for batch in merge_sorted_blocks(block_iters, batch_size):
+            outfile.writelines(batch)
+
+
 # Take set of files to merge from the command line.
 def main():
     import sys
 
-    in_iters = list(map(open, sys.argv[1:]))
-    sys.stdout.writelines(merge_iters(in_iters))
+    merge_files(sys.argv[1:], sys.stdout.buffer)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,7 @@
 from soln_10_001_merge_stock_trades import merge_iters
+from soln_10_001_merge_stock_trades import merge_files, merge_sorted_blocks
 
+import io
 from itertools import chain
 from math import factorial
 from random import randrange
@@ -16,4 +18,52 @@ def test_merge_iters():
                 size = randrange(2 * N + 1) + 1
                 xs = sorted([randrange(size) for _ in range(randrange(size))])
                 xss.append(xs)
-            sorted(chain(*xss)) == list(merge_iters(xss))
+            assert sorted(chain(*xss)) == list(merge_iters(xss))
+
+
+class Keyed(object):
+    """A value ordered by its key alone, to check that merges are stable."""
+
+    def __init__(self, key, tag):
+        self.key, self.tag = key, tag
+
+    def __lt__(self, other):
+        return self.key < other.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+def split_into_blocks(xs):
+    blocks = []
+    while xs:
+        size = randrange(1, len(xs) + 1)
+        blocks.append(xs[:size])
+        xs = xs[size:]
+    return blocks
+
+
+def test_merge_sorted_blocks():
+    assert list(merge_sorted_blocks([])) == []
+    assert list(merge_sorted_blocks([[], []])) == []
+    for N in range(8):
+        for _ in range(factorial(N)):
+            xss = []
+            for tag in range(N):
+                size = randrange(2 * N + 1) + 1
+                keys = sorted([randrange(size) for _ in range(randrange(size))])
+                xss.append([Keyed(key, tag) for key in keys])
+            batches = merge_sorted_blocks(map(split_into_blocks, xss), batch_size=3)
+            expected = [(x.key, x.tag) for x in sorted(chain(*xss))]
+            assert [(x.key, x.tag) for x in chain(*batches)] == expected
+
+
+def test_merge_files(tmp_path):
+    contents = [b"", b"1 a\n3 a\n", b"2 b\n3 b\n4 b\n", b"0 c\n5 c\n"]
+    infiles = []
+    for i, content in enumerate(contents):
+        infiles.append(tmp_path / ("trades%d" % i))
+        infiles[-1].write_bytes(content)
+    out = io.BytesIO()
+    merge_files(infiles, out, block_size=1, batch_size=2)
+    assert out.getvalue() == b"0 c\n1 a\n2 b\n3 a\n3 b\n4 b\n5 c\n"
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""External sorting of stock trades, to feed "Merge Stock Trades", EPI 10.1.
+
+The merge functions in soln_10_001_merge_stock_trades need inputs whose
+lines are already sorted.  When the files of trades are unsorted and
+too big to sort in memory, we can sort them externally in two phases:
+
+1.  Split the input into runs small enough to sort in memory, sort
+    each run (in parallel worker processes), and spill the sorted runs
+    to temporary files.
+
+2.  Merge the runs.  Since a merge holds a buffer for each of its
+    inputs, it can only merge so many runs at once -- its fan-in -- so
+    if there are more, merge them in groups into longer runs, and
+    repeat until one final merge can write the output.
+
+All of this is bounded by a memory budget, max_memory, which is divided
+among the runs in flight during phase 1 and among the buffers of the
+merges during phase 2.  (The budget is approximate: a line held in
+memory costs its bytes plus a fixed overhead for its object and its
+slot in a list, so we estimate the mean line length -- in phase 1 from
+a sample of the input, in phase 2 from the runs -- and size the runs
+and buffers to leave room for the overhead, with a factor of two to
+spare.)
+
+The runs are stored as sorted lines, which is already compact and which
+readlines can split back into lines in C, so no length prefixes are
+needed.
+
+"""
+
+import collections
+import multiprocessing
+import os
+import sys
+import tempfile
+from io import BytesIO
+
+from soln_10_001_merge_stock_trades import merge_files
+
+# The memory a line costs beyond its bytes: a bytes object's header and a
+# slot in the list holding it.
+LINE_OVERHEAD = sys.getsizeof(b"") + 8
+
+
+def sort_files(infiles, outfile, max_memory=2**28, fan_in=64, processes=1, tmpdir=None):
+    """Sort the lines of the files infiles into the binary file outfile.
+
+    Uses about max_memory bytes of memory, merges up to fan_in runs at
+    a time, sorts runs in a pool of that many processes if processes > 1,
+    and spills runs into a temporary directory within tmpdir.
+
+    """
+    if fan_in < 2:
+        raise ValueError("fan_in must be at least 2")
+    # A run's chunk is held both as bytes and as lines while it's sorted.
+    line_size = sample_line_size(infiles)
+    run_memory = 1 + (line_size + LINE_OVERHEAD) / line_size
+    run_size = max(1, int(max_memory / (2 * (processes + 1) * run_memory)))
+    with tempfile.TemporaryDirectory(dir=tmpdir) as tmp:
+        runs, line_count = sorted_runs(infiles, tmp, run_size, processes)
+        # Each merge holds a block of lines per run plus an output batch,
+        # which merge_files counts in lines, not bytes.
+        line_size = max(1, sum(map(os.path.getsize, runs))) / max(1, line_count)
+        block_memory = (line_size + LINE_OVERHEAD) / line_size
+        block_size = max(1, int(max_memory / (2 * (fan_in + 1) * block_memory)))
+        batch_size = max(1, int(block_size / line_size))
+        passes = 0
+        while len(runs) > fan_in:
+            passes += 1
+            merged_runs = []
+            for i in range(0, len(runs), fan_in):
+                group = runs[i : i + fan_in]
+                merged_runs.append(os.path.join(tmp, "merged%d-%d" % (passes, i)))
+                with open(merged_runs[-1], "wb") as f:
+                    merge_files(group, f, block_size, batch_size)
+                for run in group:
+                    os.remove(run)
+            runs = merged_runs
+        merge_files(runs, outfile, block_size, batch_size)
+
+
+def sample_line_size(infiles, sample_size=2**16):
+    """Estimate the mean length of the lines of infiles, in bytes, from
+    the first sample_size bytes of the first nonempty file."""
+    for name in infiles:
+        with open(name, "rb") as f:
+            sample = f.read(sample_size)
+        if sample:
+            return len(sample) / max(1, sample.count(b"\n"))
+    return 1
+
+
+def sorted_runs(infiles, tmp, run_size, processes=1):
+    """Split the lines of infiles into sorted runs in files in directory tmp.
+
+    Returns the runs' paths and the count of their lines.  The runs
+    hold about run_size bytes each.
+
+    """
+    runs = []
+    line_count = 0
+    pending = collections.deque()  # results of runs being sorted
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    try:
+        for chunk in read_chunks(infiles, run_size):
+            runs.append(os.path.join(tmp, "run%d" % len(runs)))
+            if pool is None:
+                line_count += sort_run(chunk, runs[-1])
+                continue
+            # Bound the runs in flight, so that we don't read ahead of
+            # the workers and out of memory.
+            if len(pending) >= processes:
+                line_count += pending.popleft().get()
+            pending.append(pool.apply_async(sort_run, (chunk, runs[-1])))
+        while pending:
+            line_count += pending.popleft().get()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return runs, line_count
+
+
+def read_chunks(infiles, chunk_size):
+    """Yield the files' contents in chunks of about chunk_size bytes of
+    whole lines, each ending with a newline."""
+    for name in infiles:
+        with open(name, "rb") as f:
+            carry = b""  # the partial line at the end of the last read
+            for data in iter(lambda: f.read(chunk_size), b""):
+                data = carry + data
+                end = data.rfind(b"\n") + 1
+                if end:
+                    yield data[:end]
+                carry = data[end:]
+            if carry:
+                yield carry + b"\n"
+
+
+def sort_run(chunk, path):
+    """Sort the lines of chunk into the file path and return their count."""
+    lines = BytesIO(chunk).readlines()
+    lines.sort()
+    with open(path, "wb") as f:
+        f.writelines(lines)
+    return len(lines)
+
+
+# Take set of files to sort from the command line.
+def main():
+    sort_files(sys.argv[1:], sys.stdout.buffer, processes=os.cpu_count())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from soln_10_001_sort_stock_trades import read_chunks, sort_files
+
+import io
+from random import Random
+import tracemalloc
+
+import pytest
+
+
+def write_trades(tmp_path, rng, n_files, n_lines):
+    infiles, lines = [], []
+    for i in range(n_files):
+        trades = [b"%06d %d\n" % (rng.randrange(10**6), i) for _ in range(n_lines)]
+        infiles.append(tmp_path / ("trades%d" % i))
+        infiles[-1].write_bytes(b"".join(trades))
+        lines += trades
+    return infiles, sorted(lines)
+
+
+def test_read_chunks(tmp_path):
+    path = tmp_path / "trades"
+    path.write_bytes(b"a\nbb\nccc\n\ndddd")
+    assert list(read_chunks([path], 100)) == [b"a\nbb\nccc\n\n", b"dddd\n"]
+    assert list(read_chunks([path], 4)) == [b"a\n", b"bb\n", b"ccc\n\n", b"dddd\n"]
+    assert b"".join(read_chunks([path], 1)) == b"a\nbb\nccc\n\ndddd\n"
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_sort_files(tmp_path, processes):
+    infiles, expected = write_trades(tmp_path, Random(20), 5, 200)
+    for max_memory, fan_in in [(2**20, 64), (2**12, 64), (2**12, 2)]:
+        out = io.BytesIO()
+        sort_files(infiles, out, max_memory, fan_in, processes, tmpdir=tmp_path)
+        assert out.getvalue() == b"".join(expected)
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(p.name for p in infiles)
+
+
+def test_sort_files_stays_within_max_memory(tmp_path):
+    infiles, expected = write_trades(tmp_path, Random(21), 4, 25000)
+    max_memory = 2**19  # a fraction of the 1 MB of trades
+    out_path = tmp_path / "sorted"
+    with open(out_path, "wb") as out:
+        tracemalloc.start()
+        try:
+            sort_files(infiles, out, max_memory, fan_in=8, tmpdir=tmp_path)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    assert out_path.read_bytes() == b"".join(expected)
+    assert peak <= max_memory
@@ -83,13 +83,32 @@ Now I offer three Python implementations:
 3.  Bottom-up dynamic programming, w/ trimmed memo table of 2 rows.
     Time use is O(len(A) * len(B)), but space use improves to O(len(B)).
 
-They all follow closely to the reasoning I give above, so I won't
+And two faster ones for when you must compare lots of strings:
+
+4.  Myers's bit-parallel algorithm, which computes a whole column of
+    the memo table with a few operations on bit vectors (Python ints).
+    Time use is O(len(A) * len(B) / w) for w-bit machine words.
+
+5.  Ukkonen's banded dynamic programming, for when you only care about
+    distances up to some bound k: it returns k + 1 for any greater
+    distance.  Only cells within k of the table's diagonal can hold
+    distances <= k, so time use is O(k * len(A)) and space use O(len(B)),
+    and it stops early once a whole row exceeds k.
+
+The first three follow closely to the reasoning I give above, so I won't
 elaborate further in the comments, reserving them instead for
 implementation details.
 
+Finally, to find not just the distance but the edits that achieve it,
+levenshtein_edit_script uses Hirschberg's divide and conquer: split A
+in half, find where in B an optimal alignment crosses the split using
+the two-row version from both ends, and recurse on the two halves.
+Time use is O(len(A) * len(B)) and space use is O(len(A) + len(B)).
+
 """
 
 import functools
+import multiprocessing
 
 
 # Recursive version.
@@ -135,9 +154,15 @@ def levenshtein_distance2(A, B):
 
 # Dynamic programming, trimmed version.
 def levenshtein_distance3(A, B):
+    # the solution is in the topmost cell
+    return levenshtein_top_row(A, B)[0]
+
+
+def levenshtein_top_row(A, B):
     # In this version, I keep only the 2 most-recent rows of the memo
     # table.  Compared to the previous version, prev = memo[i + 1] and
-    # cur = memo[i].
+    # cur = memo[i].  It returns the topmost row, memo[0], in which
+    # memo[0][j] is the distance between A and B[j:].
 
     # initialize bottom row of the memo table
     prev = [len(B) - j for j in range(len(B) + 1)]
@@ -155,8 +180,193 @@ def levenshtein_distance3(A, B):
                 cur[j] = 1 + min(prev[j], prev[j + 1], cur[j + 1])
         prev, cur = cur, prev  # recycle prev as next iteration's work row
 
-    # the solution is in the topmost cell
-    return prev[0]
+    return prev
+
+
+# Bit-parallel version.
+def levenshtein_distance4(A, B, max_distance=None):
+    # This version works on the memo table of the prefixes of A and B,
+    # D[i][j] = dist A[:i] B[:j], one column j at a time.  Neighboring
+    # cells differ by -1, 0, or +1, so a column is represented by its
+    # bottom cell D[len(A)][j] and two bit vectors holding the positions
+    # of its vertical +1 deltas (pv) and -1 deltas (mv), bit i - 1 for
+    # D[i][j] - D[i - 1][j].  See Hyyrö, H. Explaining and extending the
+    # bit-parallel approximate string matching algorithm of Myers (2001).
+    # If max_distance is given, return max_distance + 1 for greater
+    # distances, stopping as soon as they are certain.
+    if not A:
+        return len(B) if max_distance is None else min(len(B), max_distance + 1)
+    mask = (1 << len(A)) - 1
+    high_bit = 1 << (len(A) - 1)
+    match_bits = {}  # char c -> bit vector of the positions i where A[i] == c
+    for i, c in enumerate(A):
+        match_bits[c] = match_bits.get(c, 0) | (1 << i)
+    pv, mv = mask, 0  # Column 0 is 0, 1, 2, ...: all +1 deltas.
+    dist = len(A)
+    for j, c in enumerate(B):
+        eq = match_bits.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)  # horizontal +1 and -1 deltas
+        mh = pv & xh
+        if ph & high_bit:
+            dist += 1
+        elif mh & high_bit:
+            dist -= 1
+        if max_distance is not None and dist - (len(B) - j - 1) > max_distance:
+            return max_distance + 1
+        # Row 0 is 0, 1, 2, ...: its horizontal deltas are all +1.
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+    return dist if max_distance is None else min(dist, max_distance + 1)
+
+
+# Banded dynamic programming version.
+def levenshtein_distance5(A, B, max_distance):
+    # This version works on the memo table of prefixes, as the previous
+    # version does, row by row, but only on cells within max_distance of
+    # the diagonal, which is where all distances <= max_distance lie.
+    # Distances outside the band are capped at max_distance + 1.
+    k = max_distance
+    too_far = k + 1
+    if abs(len(A) - len(B)) > k:
+        return too_far
+
+    # initialize top row of the memo table, cells j <= k in the band
+    prev = [min(j, too_far) for j in range(len(B) + 1)]
+
+    # allocate a scratch space for the current work row
+    cur = [too_far for _ in prev]
+
+    for i in range(1, len(A) + 1):
+        lo, hi = max(1, i - k), min(len(B), i + k)
+        cur[lo - 1] = i if lo == 1 else too_far
+        row_min = cur[lo - 1]
+        a = A[i - 1]
+        for j in range(lo, hi + 1):
+            if a == B[j - 1]:
+                d = prev[j - 1]
+            else:
+                d = 1 + min(prev[j - 1], prev[j], cur[j - 1])
+            if d > too_far:
+                d = too_far
+            cur[j] = d
+            if d < row_min:
+                row_min = d
+        if hi < len(B):
+            cur[hi + 1] = too_far  # next row's band reaches one cell further
+        if row_min > k:
+            return too_far  # every path to the bottom cell crosses this row
+        prev, cur = cur, prev
+
+    return prev[len(B)]
+
+
+# Edit script, divide-and-conquer version.
+def levenshtein_edit_script(A, B, processes=1):
+    """Returns a shortest list of edits that convert string A into B.
+
+    Each edit is a tuple (op, a, b) that consumes a, a character of A or
+    "" for none, and produces b, a character of B or "" for none:
+
+        ("keep", x, x), ("replace", x, y), ("delete", x, ""), ("insert", "", y)
+
+    so the number of edits other than "keep" is the Levenshtein distance.
+
+    If processes > 1, the subproblems are solved in a pool of that many
+    processes, a level of the divide-and-conquer tree at a time.
+
+    """
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    map_ = pool.map if pool else lambda f, xs: list(map(f, xs))
+    try:
+        # The edit script in pieces: a list of edits for each solved
+        # subproblem, and a pair (A, B) for each unsolved subproblem.
+        pieces = [(A, B)]
+        while any(isinstance(piece, tuple) for piece in pieces):
+            # Solve small subproblems with the full memo table; for big
+            # ones, find both halves' rows of the split (to run together).
+            small, big, row_args = [], [], []
+            for piece in pieces:
+                if isinstance(piece, tuple):
+                    a, b = piece
+                    if _is_small(a, b):
+                        small.append(piece)
+                    else:
+                        big.append(piece)
+                        mid = len(a) // 2
+                        row_args += [(a[:mid][::-1], b[::-1]), (a[mid:], b)]
+            small_scripts = iter(map_(_small_edit_script, small))
+            rows = iter(map_(_top_row, row_args))
+            next_pieces = []
+            for piece in pieces:
+                if not isinstance(piece, tuple):
+                    next_pieces.append(piece)
+                elif _is_small(*piece):
+                    next_pieces.append(next(small_scripts))
+                else:
+                    # Cross the split where the distances on either side,
+                    # dist(a[:mid], b[:j]) + dist(a[mid:], b[j:]), add up
+                    # to the least.
+                    a, b = piece
+                    mid = len(a) // 2
+                    before, after = next(rows)[::-1], next(rows)
+                    j = min(range(len(b) + 1), key=lambda j: before[j] + after[j])
+                    next_pieces += [(a[:mid], b[:j]), (a[mid:], b[j:])]
+            pieces = next_pieces
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return [edit for piece in pieces for edit in piece]
+
+
+_TABLE_CELLS = 2**12  # Use the full memo table for subproblems this small.
+
+
+def _is_small(A, B):
+    return len(A) <= 1 or len(A) * len(B) <= _TABLE_CELLS
+
+
+def _top_row(args):
+    return levenshtein_top_row(*args)
+
+
+def _small_edit_script(args):
+    A, B = args
+
+    # fill in the memo table as in levenshtein_distance2
+    memo = [[0] * (len(B) + 1) for _ in range(len(A) + 1)]
+    for i in range(len(A)):
+        memo[i][-1] = len(A) - i
+    for j in range(len(B)):
+        memo[-1][j] = len(B) - j
+    for i in range(len(A) - 1, -1, -1):
+        for j in range(len(B) - 1, -1, -1):
+            if A[i] == B[j]:
+                memo[i][j] = memo[i + 1][j + 1]
+            else:
+                memo[i][j] = 1 + min(memo[i + 1][j], memo[i + 1][j + 1], memo[i][j + 1])
+
+    # walk from the topmost cell along cells the recurrence chose
+    script = []
+    i = j = 0
+    while i < len(A) or j < len(B):
+        if i < len(A) and j < len(B) and A[i] == B[j]:
+            script.append(("keep", A[i], B[j]))
+            i, j = i + 1, j + 1
+        elif i < len(A) and j < len(B) and memo[i][j] == 1 + memo[i + 1][j + 1]:
+            script.append(("replace", A[i], B[j]))
+            i, j = i + 1, j + 1
+        elif i < len(A) and memo[i][j] == 1 + memo[i + 1][j]:
+            script.append(("delete", A[i], ""))
+            i += 1
+        else:
+            script.append(("insert", "", B[j]))
+            j += 1
+    return script
 
 
 # Memoization decorator.
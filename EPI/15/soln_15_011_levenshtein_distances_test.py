@@ -1,12 +1,24 @@
+import itertools
+import random
+
 from soln_15_011_levenshtein_distances import (
     levenshtein_distance1,
     levenshtein_distance2,
     levenshtein_distance3,
+    levenshtein_distance4,
+    levenshtein_distance5,
+    levenshtein_edit_script,
 )
 
 
 def test_levenshtein_distances():
-    for ld in (levenshtein_distance1, levenshtein_distance2, levenshtein_distance3):
+    for ld in (
+        levenshtein_distance1,
+        levenshtein_distance2,
+        levenshtein_distance3,
+        levenshtein_distance4,
+        lambda A, B: levenshtein_distance5(A, B, max(len(A), len(B))),
+    ):
         assert 0 == ld("", "")
         assert 0 == ld("ab", "ab")
         assert 0 == ld("abc", "abc")
@@ -36,3 +48,48 @@ def test_levenshtein_distances():
         assert 2 == ld("abc", "xxc")
         assert 2 == ld("abc", "axx")
         assert 2 == ld("abc", "xbx")
+
+
+def test_levenshtein_distances_with_max_distance():
+    strings = [
+        "".join(chars) for n in range(6) for chars in itertools.product("abc", repeat=n)
+    ]
+    rng = random.Random(15)
+    for _ in range(20):
+        strings.append("".join(rng.choice("ab") for _ in range(rng.randrange(100))))
+    for A, B in itertools.product(strings[::7], repeat=2):
+        d = levenshtein_distance3(A, B)
+        assert levenshtein_distance4(A, B) == d
+        for k in range(0, 6):
+            assert levenshtein_distance4(A, B, k) == min(d, k + 1)
+            assert levenshtein_distance5(A, B, k) == min(d, k + 1)
+
+
+def check_edit_script(A, B, script):
+    assert "".join(a for _, a, _ in script) == A
+    assert "".join(b for _, _, b in script) == B
+    for op, a, b in script:
+        assert (a == b) == (op == "keep")
+        assert op in ("keep", "replace") or op == ("delete" if a else "insert")
+    assert sum(op != "keep" for op, _, _ in script) == levenshtein_distance4(A, B)
+
+
+def test_levenshtein_edit_script():
+    assert levenshtein_edit_script("", "") == []
+    assert levenshtein_edit_script("abc", "axcd") == [
+        ("keep", "a", "a"),
+        ("replace", "b", "x"),
+        ("keep", "c", "c"),
+        ("insert", "", "d"),
+    ]
+    rng = random.Random(18)
+    for n in [0, 1, 2, 10, 100, 300]:
+        for _ in range(3):
+            A = "".join(rng.choice("abc") for _ in range(n))
+            B = "".join(rng.choice("abc") for _ in range(rng.randrange(2 * n + 1)))
+            check_edit_script(A, B, levenshtein_edit_script(A, B))
+    A = "".join(rng.choice("ab") for _ in range(500))
+    B = A[:100] + A[150:400] + "".join(rng.choice("ab") for _ in range(80))
+    script = levenshtein_edit_script(A, B, processes=2)
+    check_edit_script(A, B, script)
+    assert script == levenshtein_edit_script(A, B)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Finding dictionary words near a word, building on EPI 15.11.
+
+Problem:  Given a dictionary of words, a query word, and a bound k,
+          find the dictionary words within Levenshtein distance k of
+          the query word.
+
+Calling levenshtein_distance3 on every word in the dictionary works,
+but it's slow for big dictionaries.  Here are two indexes that skip
+most of the dictionary:
+
+1.  A BK-tree (Burkhard and Keller, 1973).  Each node holds a word, and
+    its children are keyed by their distance from that word.  Since
+    Levenshtein distance obeys the triangle inequality, the words within
+    k of the query word q lie only under children whose keys are within
+    k of dist(q, word).
+
+2.  A prefix tree (trie), laid out as in the Garbled Email Code Jam
+    solution.  We walk it depth first, computing a row of the memo
+    table of levenshtein_distance3 for each node: the row for prefix p
+    holds dist(p, q[:j]) for every j.  Words sharing a prefix share its
+    rows, and once every distance in a row exceeds k, no longer prefix
+    can get back within k, so we skip the node's subtree.
+
+Both return a sorted list of (distance, word) pairs.
+
+"""
+
+from soln_15_011_levenshtein_distances import levenshtein_distance4
+
+
+class BKTree(object):
+    def __init__(self, words=()):
+        self.root = None  # node = (word, {distance: child node})
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        if self.root is None:
+            self.root = (word, {})
+            return
+        node = self.root
+        while True:
+            d = levenshtein_distance4(word, node[0])
+            if d == 0:
+                return  # already present
+            if d not in node[1]:
+                node[1][d] = (word, {})
+                return
+            node = node[1][d]
+
+    def query(self, word, k):
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node_word, children = stack.pop()
+            d = levenshtein_distance4(word, node_word)
+            if d <= k:
+                found.append((d, node_word))
+            for child_d, child in children.items():
+                if d - k <= child_d <= d + k:
+                    stack.append(child)
+        return sorted(found)
+
+
+class PrefixTree(object):
+    def __init__(self, words=()):
+        self.root = iddict()
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        t = self.root
+        for c in word:
+            t = t.setdefault(c, iddict())
+        t[EOW] = iddict()  # mark end of word
+
+    def query(self, word, k):
+        found = []
+        # Row for the empty prefix: dist("", word[:j]) = j.
+        stack = [("", self.root, list(range(len(word) + 1)))]
+        while stack:
+            prefix, tree, row = stack.pop()
+            if EOW in tree and row[-1] <= k:
+                found.append((row[-1], prefix))
+            for c, subtree in tree.items():
+                if c is EOW:
+                    continue
+                # Extend the memo table by the row for prefix + c.
+                next_row = [row[0] + 1]
+                for j, w in enumerate(word):
+                    if w == c:
+                        next_row.append(row[j])
+                    else:
+                        next_row.append(1 + min(row[j], row[j + 1], next_row[j]))
+                if min(next_row) <= k:
+                    stack.append((prefix + c, subtree, next_row))
+        return sorted(found)
+
+
+# Prefix trees, as in the Garbled Email Code Jam solution.
+
+
+class EOW(object):
+    """End-of-word marker."""
+
+    def __repr__(self):
+        return "$"
+
+
+EOW = EOW()
+
+
+class iddict(dict):
+    def __hash__(self):
+        return id(self)
@@ -0,0 +1,26 @@
+import itertools
+import random
+
+from soln_15_011_levenshtein_distances import levenshtein_distance3
+from soln_15_011_levenshtein_neighbors import BKTree, PrefixTree
+
+
+def test_levenshtein_neighbors():
+    rng = random.Random(17)
+    words = [
+        "".join(chars) for n in range(5) for chars in itertools.product("ab", repeat=n)
+    ]
+    for _ in range(200):
+        words.append("".join(rng.choice("abc") for _ in range(rng.randrange(1, 9))))
+    for index in (BKTree(words), PrefixTree(words)):
+        assert index.query("abc", 0) == ([(0, "abc")] if "abc" in words else [])
+        for query in ["", "a", "abc", "cab", "abcabc", "bbbbbbbbbbbb"]:
+            for k in range(4):
+                expected = sorted({(levenshtein_distance3(query, w), w) for w in words})
+                expected = [(d, w) for d, w in expected if d <= k]
+                assert index.query(query, k) == expected
+
+
+def test_levenshtein_neighbors_of_empty_dictionary():
+    assert BKTree().query("abc", 3) == []
+    assert PrefixTree().query("abc", 3) == []
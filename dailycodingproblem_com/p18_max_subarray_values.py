@@ -96,8 +96,6 @@ time of O(n).
 import collections
 import itertools
 
-WindowEntry = collections.namedtuple("WindowEntry", "index value")
-
 
 def max_subarray_values(xs, k):
     """Yields the maximum of each sequential k-length subarray of xs."""
@@ -108,23 +106,25 @@ def max_subarray_values(xs, k):
     assert 1 <= k <= n
 
     # Helpers to maintain a window of local maxima over a span of elements.
+    # The window holds only the indices of the maxima, not their values,
+    # which we can look up in xs.
     window = collections.deque()
 
     def window_add(x, i):
         """Adds `x` to the end of a k-length window ending at index `i`."""
         # Remove any elements before the start of the current window.
         start = i - k
-        while window and window[0].index < start:
+        while window and window[0] < start:
             window.popleft()
         # Remove from the end of the window any elements that are dominated
         # by the new end element x.
-        while window and window[-1].value <= x:
+        while window and xs[window[-1]] <= x:
             window.pop()
         # Attach the new end element.
-        window.append(WindowEntry(i - 1, x))
+        window.append(i - 1)
 
     def window_max():
-        return window[0].value
+        return xs[window[0]]
 
     # Scan the entire array, adding the current element to the end of
     # the sliding window and emitting the per-window maxima once the
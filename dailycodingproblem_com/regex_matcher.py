@@ -31,6 +31,9 @@ This problem comes from https://www.dailycodingproblem.com/ on
 """
 
 import functools
+import itertools
+import multiprocessing
+import re
 
 
 # Simple recursive implementation using string slices.
@@ -147,6 +150,200 @@ def match_regex_4(s, r):
     return False
 
 
+# Efficiency optimization for matching many strings against one regex:
+# Compile the regex into an automaton once, then match in O(len(s)) time.
+def compile(r, max_states=10000):
+    """Returns a matcher for regex r; call its method match(s) for each s."""
+    return CompiledRegex(r, max_states)
+
+
+class CompiledRegex(object):
+    """A regex compiled into a lazily built DFA.
+
+    The regex is a Thompson NFA whose states are the indices r_idx into r,
+    as in match_regex_4: reading a character moves r_idx forward or, on
+    "*", maybe keeps it.  The DFA's states are sets of NFA states, built
+    from the NFA's transitions as strings need them and cached.
+    When more than max_states DFA states are cached, the cache is flushed.
+
+    """
+
+    def __init__(self, r, max_states=10000):
+        self.r = r
+        self.max_states = max_states
+        # The string's end is matched by r[r_idx:] if it's all "*"s.
+        self.accept_idx = len(r.rstrip("*"))
+        self._flush()
+
+    def match(self, s):
+        """Returns true if string s is matched by the regex; false otherwise."""
+        transitions = self.transitions
+        state = self.start
+        for c in s:
+            next_state = transitions[state].get(c)
+            if next_state is None:
+                next_state = self._step(state, c)
+                transitions = self.transitions
+            if next_state == 0:  # The dead state, which never accepts.
+                return False
+            state = next_state
+        return self.accepting[state]
+
+    def _flush(self):
+        self.nfa_states = []  # DFA state -> its frozenset of NFA states
+        self.dfa_states = {}  # Inverse of nfa_states
+        self.transitions = []  # DFA state -> {char: next DFA state}
+        self.accepting = []  # DFA state -> whether it accepts
+        self._intern(frozenset())
+        self.start = self._intern(frozenset([0]))
+
+    def _intern(self, nfa_state):
+        dfa_state = self.dfa_states.get(nfa_state)
+        if dfa_state is None:
+            dfa_state = self.dfa_states[nfa_state] = len(self.nfa_states)
+            self.nfa_states.append(nfa_state)
+            self.transitions.append({})
+            self.accepting.append(max(nfa_state, default=-1) >= self.accept_idx)
+        return dfa_state
+
+    def _step(self, dfa_state, c):
+        """Returns the DFA state to go to from dfa_state on reading c."""
+        r = self.r
+        r_idxs = []
+        for r_idx in self.nfa_states[dfa_state]:
+            if r_idx < len(r):
+                regex_instruction = r[r_idx]
+                if regex_instruction in (".", "*", c):
+                    r_idxs.append(r_idx + 1)
+                if regex_instruction == "*":
+                    r_idxs.append(r_idx)
+        nfa_state = frozenset(r_idxs)
+        full = len(self.nfa_states) >= self.max_states
+        if full and nfa_state not in self.dfa_states:
+            self._flush()
+            return self._intern(nfa_state)
+        next_state = self._intern(nfa_state)
+        self.transitions[dfa_state][c] = next_state
+        return next_state
+
+
+# Efficiency optimization for matching many strings against many regexes:
+# Compile the regexes into one automaton that matches them all at once.
+def compile_many(rs, max_states=10000):
+    """Returns a matcher for regexes rs; call its method match(s) for each s."""
+    return MultiRegex(rs, max_states)
+
+
+class MultiRegex(object):
+    """Regexes compiled together to match strings against all of them.
+
+    Most regexes contain a literal that any string they match must
+    contain: their literal prefix (which must start the string) or else
+    their longest literal.  An Aho-Corasick automaton finds all these
+    literals in s in one pass, and only the regexes whose literals were
+    found, the candidates, are then matched with their CompiledRegexes.
+
+    (A single DFA for all the regexes at once has too many states: for
+    a thousand regexes, a cache of 10000 states thrashes.)
+
+    """
+
+    def __init__(self, rs, max_states=10000):
+        self.rs = list(rs)
+        self.max_states = max_states
+        self.compiled = [CompiledRegex(r, max_states) for r in self.rs]
+        self.unfiltered = []  # Regexes without literals
+        literal_ids = {}  # literal -> its index in literals
+        literals = []  # [(literal, [(i, whether it's a prefix of rs[i])])]
+        for i, r in enumerate(self.rs):
+            parts = re.split(r"[.*]", r)
+            anchored = bool(parts[0])
+            literal = parts[0] or max(parts, key=len)
+            if not literal:
+                self.unfiltered.append(i)
+                continue
+            if literal not in literal_ids:
+                literal_ids[literal] = len(literals)
+                literals.append((literal, []))
+            literals[literal_ids[literal]][1].append((i, anchored))
+        self.literals = literals
+        self.goto, self.fail, self.outputs = aho_corasick([w for w, _ in literals])
+
+    def match(self, s):
+        """Returns the indices of the regexes that match s, in order."""
+        compiled = self.compiled
+        return tuple(i for i in self._candidates(s) if compiled[i].match(s))
+
+    def match_batch(self, strings, processes=None, chunksize=256):
+        """Yields match(s) for each s in strings, using a process pool."""
+        with multiprocessing.Pool(
+            processes, _init_worker, (self.rs, self.max_states)
+        ) as pool:
+            yield from pool.imap(_match_in_worker, strings, chunksize)
+
+    def _candidates(self, s):
+        """Returns the regexes whose literals s contains, in order."""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        literals = self.literals
+        candidates = set(self.unfiltered)
+        node = 0
+        for end, c in enumerate(s, 1):
+            while node and c not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(c, 0)
+            for literal_id in outputs[node]:
+                literal, ids = literals[literal_id]
+                for i, anchored in ids:
+                    if not anchored or end == len(literal):
+                        candidates.add(i)
+        return sorted(candidates)
+
+
+_worker_regex = None  # Each pool worker's MultiRegex
+
+
+def _init_worker(rs, max_states):
+    global _worker_regex
+    _worker_regex = MultiRegex(rs, max_states)
+
+
+def _match_in_worker(s):
+    return _worker_regex.match(s)
+
+
+def aho_corasick(words):
+    """Returns an Aho-Corasick automaton that finds words in a string.
+
+    The automaton is a trie of the words, with nodes numbered from 0 for
+    the root, given as three lists indexed by node: goto, a dict from each
+    character to the child it leads to; fail, the node for the longest
+    proper suffix of the node's string that is in the trie; and outputs,
+    the indices of the words that end at the node's string.
+
+    """
+    goto, fail, outputs = [{}], [0], [[]]
+    for word_id, word in enumerate(words):
+        node = 0
+        for c in word:
+            if c not in goto[node]:
+                goto[node][c] = len(goto)
+                goto.append({})
+                fail.append(0)
+                outputs.append([])
+            node = goto[node][c]
+        outputs[node].append(word_id)
+    queue = list(goto[0].values())  # Breadth-first, so fail links are ready.
+    for node in queue:
+        for c, child in goto[node].items():
+            suffix = fail[node]
+            while suffix and c not in goto[suffix]:
+                suffix = fail[suffix]
+            fail[child] = goto[suffix].get(c, 0) if node else 0
+            outputs[child] += outputs[fail[child]]
+            queue.append(child)
+    return goto, fail, outputs
+
+
 def memoize(f):
     """Make a memoized version of f that returns cached results."""
     cache = {}
@@ -164,8 +361,26 @@ def memoize(f):
 import pytest
 
 
+def match_regex_5(s, r):
+    """Returns true if string s is matched by regex r; false otherwise."""
+    return compile(r).match(s)
+
+
+def match_regex_6(s, r):
+    """Like match_regex_5, but with a DFA cache that's too small to keep."""
+    return compile(r, max_states=3).match(s)
+
+
 @pytest.mark.parametrize(
-    "M", [match_regex_1, match_regex_2, match_regex_3, match_regex_4]
+    "M",
+    [
+        match_regex_1,
+        match_regex_2,
+        match_regex_3,
+        match_regex_4,
+        match_regex_5,
+        match_regex_6,
+    ],
 )
 def test_regex_matcher(M):
     # Case: empty string and empty regex.
@@ -189,3 +404,41 @@ def test_regex_matcher(M):
     assert M("chats", ".*at") == False
     assert M("chat", "char") == False
     assert M("chat", "hat") == False
+
+
+def test_compiled_regex_matches_many_strings():
+    strings = [
+        "".join(chars) for n in range(6) for chars in itertools.product("abc", repeat=n)
+    ]
+    for r in ["", "a", ".", "*", "a*b", "*a.", ".*b*", "ab*ba", "**a"]:
+        for max_states in [2, 3, 10000]:
+            compiled = compile(r, max_states)
+            for s in strings:
+                assert compiled.match(s) == match_regex_4(s, r)
+
+
+def test_multi_regex_matches_every_regex_at_once():
+    rs = ["", "a", ".", "*", "a*b", "*a.", ".*b*", "ab*ba", "**a", "ab", "b*ab", "ab"]
+    strings = [
+        "".join(chars) for n in range(6) for chars in itertools.product("abc", repeat=n)
+    ]
+    for max_states in [3, 10000]:
+        matcher = compile_many(rs, max_states)
+        for s in strings:
+            expected = tuple(i for i, r in enumerate(rs) if match_regex_4(s, r))
+            assert matcher.match(s) == expected
+    assert list(matcher.match_batch(strings, processes=2, chunksize=16)) == [
+        matcher.match(s) for s in strings
+    ]
+
+
+def test_aho_corasick():
+    goto, fail, outputs = aho_corasick(["he", "she", "his", "hers"])
+    found = []
+    node = 0
+    for end, c in enumerate("ushers", 1):
+        while node and c not in goto[node]:
+            node = fail[node]
+        node = goto[node].get(c, 0)
+        found += [(end, word_id) for word_id in outputs[node]]
+    assert sorted(found) == [(4, 0), (4, 1), (6, 3)]
@@ -10,6 +10,7 @@ http://code.google.com/codejam/contest/90101/dashboard#s=p1
 """
 
 import fileinput
+from array import array
 
 # relative position of neighbors, in order of tie-break preference
 NEIGHBOR_OFFSETS = [(-1, 0), (0, -1), (0, 1), (1, 0)]
@@ -22,43 +23,121 @@ def main():
 
 
 def solve(H, W, heights):
-    # start w/ cells as singleton sets
-    union, find = mk_union_find_domain(heights)
+    # start w/ cells as singleton sets, identified by row * W + col
+    basins = UnionFind(range(H * W))
 
     # merge sets along flows to form basins
-    for loc in heights:
-        downstream_neighbor, lowest = None, heights[loc]
-        for delta in NEIGHBOR_OFFSETS:
-            loc1 = loc[0] + delta[0], loc[1] + delta[1]
-            if heights.get(loc1, lowest) < lowest:
-                downstream_neighbor, lowest = loc1, heights[loc1]
-        if downstream_neighbor is not None:
-            union(loc, downstream_neighbor)
+    def flows():
+        for loc in heights:
+            downstream_neighbor, lowest = None, heights[loc]
+            for delta in NEIGHBOR_OFFSETS:
+                loc1 = loc[0] + delta[0], loc[1] + delta[1]
+                if heights.get(loc1, lowest) < lowest:
+                    downstream_neighbor, lowest = loc1, heights[loc1]
+            if downstream_neighbor is not None:
+                yield (
+                    loc[0] * W + loc[1],
+                    downstream_neighbor[0] * W + downstream_neighbor[1],
+                )
+
+    basins.union_many(flows())
 
     # draw map
     labels = {}
 
     def label(loc):
-        return labels.setdefault(find(loc), chr(ord("a") + len(labels)))
+        return labels.setdefault(basins.find(loc), chr(ord("a") + len(labels)))
 
     return "\n".join(
-        " ".join(label((row, col)) for col in range(W)) for row in range(H)
+        " ".join(label(row * W + col) for col in range(W)) for row in range(H)
     )
 
 
-def mk_union_find_domain(elems):
-    d = dict((e, e) for e in elems)
-
-    def union(u, v):
-        d[find(u)] = find(v)
-
-    def find(u):
-        urep = d[u]
-        if urep != u:
-            urep = d[u] = find(urep)
-        return urep
-
-    return union, find
+class UnionFind:
+    """Disjoint sets, initially singletons, over a fixed domain of elements.
+
+    Each element is mapped once to a dense int id; parents and ranks are
+    kept in arrays indexed by id.  If the domain is range(n), elements
+    are their own ids and no mapping is stored.  Find runs iteratively
+    with path halving, so deep chains can't exhaust the stack.
+    """
+
+    def __init__(self, elems):
+        if isinstance(elems, range) and elems.start == 0 and elems.step == 1:
+            self.elems, self.ids = elems, None
+        else:
+            self.ids = {}
+            for e in elems:
+                self.ids.setdefault(e, len(self.ids))
+            self.elems = list(self.ids)
+        self.parent = array("i", range(len(self.elems)))
+        self.rank = array("B", bytes(len(self.elems)))  # Ranks <= log2(n).
+
+    def __len__(self):
+        return len(self.elems)
+
+    def find(self, u):
+        """Get the representative element of the set containing u."""
+        return self.elems[self.find_id(self._id(u))]
+
+    def union(self, u, v):
+        """Merge the sets containing u and v."""
+        self.union_ids(self._id(u), self._id(v))
+
+    def union_many(self, pairs):
+        """Merge the sets containing u and v for each pair (u, v) in pairs."""
+        ids = self.ids
+        union_ids = self.union_ids
+        if ids is None:
+            _id = self._id  # Range ids need bounds checks, like union's.
+            for u, v in pairs:
+                union_ids(_id(u), _id(v))
+        else:
+            for u, v in pairs:
+                union_ids(ids[u], ids[v])
+
+    def find_id(self, i):
+        """Get the id of the representative of the set containing id i."""
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = i = parent[parent[i]]  # Path halving.
+        return i
+
+    def union_ids(self, i, j):
+        """Merge the sets containing ids i and j."""
+        i = self.find_id(i)
+        j = self.find_id(j)
+        if i != j:
+            rank = self.rank
+            if rank[i] < rank[j]:
+                i, j = j, i
+            self.parent[j] = i
+            if rank[i] == rank[j]:
+                rank[i] += 1
+
+    def components(self):
+        """Get a list of the sets, each a list of elements."""
+        members = {}
+        find_id = self.find_id
+        for i, e in enumerate(self.elems):
+            members.setdefault(find_id(i), []).append(e)
+        return list(members.values())
+
+    def component_sizes(self):
+        """Get a dict mapping each set's representative element to its size."""
+        sizes = {}
+        find_id = self.find_id
+        for i in range(len(self.elems)):
+            rep = find_id(i)
+            sizes[rep] = sizes.get(rep, 0) + 1
+        return dict((self.elems[i], n) for i, n in sizes.items())
+
+    def _id(self, u):
+        if self.ids is None:
+            if not 0 <= u < len(self.elems):
+                raise KeyError(u)
+            return u
+        return self.ids[u]
 
 
 def read_problems(lines):
@@ -68,11 +147,11 @@ def read_problems(lines):
 
 
 def read_problem(lines):
-    H, W = list(map(int, lines.next().split()))
+    H, W = list(map(int, next(lines).split()))
     heights = dict(
         ((row, col), int(s))
         for row in range(H)
-        for (col, s) in enumerate(lines.next().split())
+        for (col, s) in enumerate(next(lines).split())
     )
     return H, W, heights
 
@@ -10,6 +10,7 @@ https://code.google.com/codejam/contest/2270488/dashboard#s=p2
 """
 
 import fileinput
+import math
 
 
 def main():
@@ -49,18 +50,10 @@ def read_problem(lines):
 
 
 def isqrt(x, want_upper_bound=False):
-    lo, hi = 1, x
-    while True:
-        if hi - lo < 2:
-            return hi if want_upper_bound else lo
-        mid = lo + ((hi - lo) >> 1)
-        d = cmp(mid * mid, x)
-        if d < 0:
-            lo = mid
-        elif d > 0:
-            hi = mid
-        else:
-            return mid
+    r = math.isqrt(x)
+    if want_upper_bound and r * r < x:
+        r += 1
+    return r
 
 
 def palindromes(ndigits, min_leading_digit=1):
@@ -100,7 +93,7 @@ def palindromes(ndigits, min_leading_digit=1):
 
 
 def read_ints(lines):
-    return [int(s) for s in lines.next().split()]
+    return [int(s) for s in next(lines).split()]
 
 
 if __name__ == "__main__":
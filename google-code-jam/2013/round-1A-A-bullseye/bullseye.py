@@ -36,6 +36,7 @@ And that's our closed-form for n.
 """
 
 import fileinput
+import math
 
 
 def main():
@@ -54,18 +55,10 @@ def solve(problem):
 
 
 def isqrt(x, want_upper_bound=False):
-    lo, hi = 1, x
-    while True:
-        if hi - lo < 2:
-            return hi if want_upper_bound else lo
-        mid = lo + ((hi - lo) >> 1)
-        d = cmp(mid * mid, x)
-        if d < 0:
-            lo = mid
-        elif d > 0:
-            hi = mid
-        else:
-            return mid
+    r = math.isqrt(x)
+    if want_upper_bound and r * r < x:
+        r += 1
+    return r
 
 
 def read_problems(lines):
@@ -80,7 +73,7 @@ def read_problem(lines):
 
 
 def read_ints(lines):
-    return [int(s) for s in lines.next().split()]
+    return [int(s) for s in next(lines).split()]
 
 
 if __name__ == "__main__":
@@ -131,7 +131,7 @@ def solve(problem):
     N, X, Y = problem
     if N == 0:
         return 0.0
-    i = find_int_by_bisection(s, 1, N, N)
+    i = s_inverse(N)
     if is_triangle_diamond(X, Y, i):
         return 1.0  # case A
     if not is_triangle_diamond(X, Y, i + 1):
@@ -157,6 +157,11 @@ def s(i):
     return i * (2 * i - 1)
 
 
+def s_inverse(n):
+    """Find the largest complete triangle i such that s(i) <= n."""
+    return (1 + math.isqrt(8 * n + 1)) // 4  # Solve 2i^2 - i - n = 0.
+
+
 def b(i):
     """Get the base length in diamonds of the complete triangle i."""
     if i < 1:
@@ -184,30 +189,5 @@ def read_ints(lines):
     return [int(s) for s in next(lines).split()]
 
 
-def find_int_by_bisection(f, lo, hi, y):
-    """Find maximal int x in [lo, hi] such that f(x) <= y.
-
-    Note: f must be monotonic within the range [lo, hi].
-
-    """
-    _check_bisection_bounds(f, lo, hi, y)
-    while lo < hi:
-        mid = lo + ((hi - lo) >> 1)
-        if f(mid) <= y:
-            lo = mid + 1
-        else:
-            hi = mid - 1
-    return lo if f(lo) <= y else lo - 1
-
-
-def _check_bisection_bounds(f, lo, hi, y):
-    if lo > hi:
-        raise ValueError("lower bound is above upper bound")
-    if y < f(lo):
-        raise ValueError("solution is below lower bound")
-    if y > f(hi):
-        raise ValueError("solution is above upper bound")
-
-
 if __name__ == "__main__":
     main()
@@ -100,6 +100,7 @@ a forward-only path of length N, completing the proof.
 """
 
 import fileinput
+import math
 
 
 def main():
@@ -114,7 +115,7 @@ def solve(problem):
         return ""
     X, Y, denormalize = normalize(X, Y)
     xy_dist = X + Y
-    N = find_int_by_bisection(S, 0, xy_dist, xy_dist)
+    N = S_inverse(xy_dist)
     # are we exactly on the band for N?
     if xy_dist == S(N):
         return denormalize(forward_path_with_optional_reversal(X, N))
@@ -179,6 +180,11 @@ def S(n):
     return n * (n + 1) // 2  # Gauss's formula
 
 
+def S_inverse(s):
+    """Find maximal n >= 0 such that S(n) <= s."""
+    return (math.isqrt(8 * s + 1) - 1) // 2  # Solve n^2 + n - 2s = 0.
+
+
 def read_problems(lines):
     T = int(next(lines))
     for _ in range(T):
@@ -191,32 +197,7 @@ def read_problem(lines):
 
 
 def read_ints(lines):
-    return [int(s) for s in lines.next().split()]
-
-
-def find_int_by_bisection(f, lo, hi, y):
-    """Find maximal int x in [lo, hi] such that f(x) <= y.
-
-    Note: f must be monotonic within the range [lo, hi].
-
-    """
-    _check_bisection_bounds(f, lo, hi, y)
-    while lo < hi:
-        mid = lo + ((hi - lo) >> 1)
-        if f(mid) <= y:
-            lo = mid + 1
-        else:
-            hi = mid - 1
-    return lo if f(lo) <= y else lo - 1
-
-
-def _check_bisection_bounds(f, lo, hi, y):
-    if lo > hi:
-        raise ValueError("lower bound is above upper bound")
-    if y < f(lo):
-        raise ValueError("solution is below lower bound")
-    if y > f(hi):
-        raise ValueError("solution is above upper bound")
+    return [int(s) for s in next(lines).split()]
 
 
 if __name__ == "__main__":
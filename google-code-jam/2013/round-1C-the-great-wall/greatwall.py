@@ -9,13 +9,12 @@ https://code.google.com/codejam/contest/2437488/dashboard#s=p2
 
 """
 
+from array import array
+from bisect import bisect_right
 from collections import namedtuple
 import fileinput
-import heapq
-from itertools import groupby
 
 Tribe = namedtuple("Tribe", "d, n, w, e, s, delta_d, delta_p, delta_s")
-Attack = namedtuple("Attack", "d, w, e, s")
 
 
 def main():
@@ -26,112 +25,116 @@ def main():
 
 def solve(problem):
     tribes = problem
-    daily_attacks = groupby(merge(list(map(tribe_attacks, tribes))), lambda a: a.d)
+    days, ws, es, ss = attack_arrays(tribes)
+    wall = HeightIntervalSet(ws + es)
     successful_attacks = 0
-    wall = HeightIntervalSet()
-    for _day, attacks in daily_attacks:
-        repairs = []
-        for attack in attacks:
-            if wall.is_vulnerable_over_interval(attack.w, attack.e, attack.s):
-                repairs.append(attack)
-                successful_attacks += 1
-        for attack in repairs:
-            wall.set_min_height_for_interval(attack.w, attack.e, attack.s)
+    i = 0
+    while i < len(days):
+        # The day's attacks are days[i:j]; repair the wall after them all.
+        j = bisect_right(days, days[i], i)
+        repairs = [
+            k
+            for k in range(i, j)
+            if wall.is_vulnerable_over_interval(ws[k], es[k], ss[k])
+        ]
+        for k in repairs:
+            wall.set_min_height_for_interval(ws[k], es[k], ss[k])
+        successful_attacks += len(repairs)
+        i = j
     return successful_attacks
 
 
-def tribe_attacks(tribe):
-    """Yield a tribe's attacks."""
-    d, n, w, e, s, delta_d, delta_p, delta_s = tribe
-    for _ in range(n):
-        yield Attack(d, w, e, s)
-        d += delta_d
-        w += delta_p
-        e += delta_p
-        s += delta_s
+def attack_arrays(tribes):
+    """Return the tribes' attacks as arrays of days, wests, easts, and
+    strengths, sorted by day."""
+    days, ws, es, ss = (array("q") for _ in range(4))
+    for d, n, w, e, s, delta_d, delta_p, delta_s in tribes:
+        days.extend(range(d, d + n * delta_d, delta_d))
+        ws.extend(range(w, w + n * delta_p, delta_p) if delta_p else [w] * n)
+        es.extend(range(e, e + n * delta_p, delta_p) if delta_p else [e] * n)
+        ss.extend(range(s, s + n * delta_s, delta_s) if delta_s else [s] * n)
+    order = sorted(range(len(days)), key=days.__getitem__)
+    return tuple(array("q", map(xs.__getitem__, order)) for xs in (days, ws, es, ss))
 
 
-def merge(iterators):
-    """Make a lazy sorted iterator that merges lazy sorted iterators."""
-    streams = list(map(iterator_to_stream, iterators))
-    heapq.heapify(streams)
-    while streams:
-        stream = heapq.heappop(streams)
-        if stream is not None:
-            val, stream = stream_next(stream)
-            heapq.heappush(streams, stream)
-            yield val
-
-
-def iterator_to_stream(iterator):
-    """Convert an iterator into a stream (None if the iterator is empty)."""
-    try:
-        return next(iterator), iterator
-    except StopIteration:
-        return None
-
-
-def stream_next(stream):
-    """Get (next_value, next_stream) from a stream."""
-    val, iterator = stream
-    return val, iterator_to_stream(iterator)
-
-
-import sys
-
-try:
-    # Hide this import to allow pytest to scan this module w/o failing.
-    from blist import sorteddict  # http://stutzbachenterprises.com/blist/
-except:
-    import pytest
+class HeightIntervalSet(object):
+    """The heights of a wall over the points and gaps between given points.
 
-    pytest.skip(allow_module_level=True)
+    A segment tree over the points, sorted, and the open gaps between
+    them, in order.  Each node holds raised, the greatest height that its
+    whole subtree was raised to at least, and min_height, the min height
+    over its subtree, counting raises of the node and its descendants
+    but not of its ancestors.  Since raises commute, they never need to
+    be pushed down the tree: each operation climbs it bottom up in
+    O(log n) time for n points.  Intervals must start and end at points.
 
+    """
 
-class HeightIntervalSet(object):
-    def __init__(self, initial_height=0):
-        self.heights = sorteddict(
-            [(-sys.maxsize - 1, initial_height), (sys.maxsize, initial_height)]
-        )
+    def __init__(self, points, initial_height=0):
+        points = sorted(set(points))
+        self.leaf_index = {x: 2 * i for i, x in enumerate(points)}
+        self.size = 1 << (2 * len(points) - 1).bit_length()
+        self.min_height = [initial_height] * (2 * self.size)
+        self.raised = [initial_height] * (2 * self.size)
 
     def is_vulnerable_over_interval(self, start, end, min_val):
-        start *= 2
-        end *= 2
-        ks = self.heights._sortedkeys
-        i = ks.bisect_right(start) - 1
-        j = ks.bisect_right(end)
-        return any(self.heights[ks[k]] < min_val for k in range(i, j))
+        return self.min_height_over_interval(start, end) < min_val
+
+    def min_height_over_interval(self, start, end):
+        min_height, raised = self.min_height, self.raised
+        l = self.leaf_index[start] + self.size
+        r = self.leaf_index[end] + self.size + 1
+        # The nodes taken on the left (right) so far all lie under node
+        # l - 1 (r) of the current level, so those raises apply to them.
+        left = right = float("inf")
+        while l < r:
+            if l & 1:
+                if min_height[l] < left:
+                    left = min_height[l]
+                l += 1
+            if r & 1:
+                r -= 1
+                if min_height[r] < right:
+                    right = min_height[r]
+            l >>= 1
+            r >>= 1
+            if raised[l - 1] > left:
+                left = raised[l - 1]
+            if raised[r] > right:
+                right = raised[r]
+        l -= 1
+        while l > 1:
+            l >>= 1
+            if raised[l] > left:
+                left = raised[l]
+        while r > 1:
+            r >>= 1
+            if raised[r] > right:
+                right = raised[r]
+        return min(left, right)
 
     def set_min_height_for_interval(self, start, end, min_height):
-        start *= 2
-        end *= 2
-        ks = self.heights._sortedkeys
-        i = ks.bisect_right(start) - 1
-        x = ks[i]
-        height = self.heights[x]
-        current_height = background_height = height
-        if height < min_height:
-            current_height = min_height
-            self.heights[start] = min_height
-            if x != start:
-                i += 1
-        while True:
-            i += 1
-            x = ks[i]
-            height = self.heights[x]
-            if x > end:
-                if x != end + 1:
-                    self.heights[end + 1] = background_height
-                break
-            background_height = height
-            if height < min_height:
-                if current_height == min_height:
-                    del self.heights[x]
-                    i -= 1
-                else:
-                    self.heights[x] = current_height = min_height
-            else:
-                current_height = height
+        heights, raised, size = self.min_height, self.raised, self.size
+        l = l0 = self.leaf_index[start] + size
+        r = r0 = self.leaf_index[end] + size + 1
+        while l < r:
+            if l & 1:
+                if heights[l] < min_height:
+                    heights[l] = raised[l] = min_height
+                l += 1
+            if r & 1:
+                r -= 1
+                if heights[r] < min_height:
+                    heights[r] = raised[r] = min_height
+            l >>= 1
+            r >>= 1
+        # Recompute the min heights above the interval's ends.
+        for k in (l0 >> 1, (r0 - 1) >> 1):
+            while k:
+                left, right = heights[2 * k], heights[2 * k + 1]
+                height = left if left < right else right
+                heights[k] = height if height > raised[k] else raised[k]
+                k >>= 1
 
 
 def read_problems(lines):
@@ -150,7 +153,7 @@ def read_problem(lines):
 
 
 def read_ints(lines):
-    return [int(s) for s in lines.next().split()]
+    return [int(s) for s in next(lines).split()]
 
 
 if __name__ == "__main__":
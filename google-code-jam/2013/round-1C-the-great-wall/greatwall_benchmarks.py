@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+"""Benchmarks for `greatwall`: attack arrays vs. merged attack tuples.
+
+Usage:    python greatwall_benchmarks.py [TRIBES]
+
+"""
+
+from collections import namedtuple
+import heapq
+from itertools import groupby
+import random
+import sys
+import timeit
+
+import greatwall
+from greatwall import HeightIntervalSet, Tribe
+
+Attack = namedtuple("Attack", "d, w, e, s")
+
+
+def timed(f, *args):
+    """Call f(*args) once and return the elapsed time in seconds."""
+    return timeit.timeit(lambda: f(*args), number=1)
+
+
+def random_tribes(count, seed=2013):
+    """Make count one-attack tribes, within the large input's limits."""
+    rand = random.Random(seed)
+    tribes = []
+    for _ in range(count):
+        w = rand.randint(-(10**8), 10**8)
+        tribes.append(
+            Tribe(
+                rand.randint(0, 676060),
+                1,
+                w,
+                w + rand.randint(1, 1000),
+                rand.randint(1, 10**6),
+                1,
+                0,
+                0,
+            )
+        )
+    return tribes
+
+
+# The attacks as namedtuples, heap-merged by day, as greatwall once made them.
+
+
+def tuple_solve(tribes):
+    attacks = list(merge(list(map(tribe_attacks, tribes))))
+    daily_attacks = groupby(attacks, lambda a: a.d)
+    successful_attacks = 0
+    wall = HeightIntervalSet([a.w for a in attacks] + [a.e for a in attacks])
+    for _day, attacks in daily_attacks:
+        repairs = []
+        for attack in attacks:
+            if wall.is_vulnerable_over_interval(attack.w, attack.e, attack.s):
+                repairs.append(attack)
+                successful_attacks += 1
+        for attack in repairs:
+            wall.set_min_height_for_interval(attack.w, attack.e, attack.s)
+    return successful_attacks
+
+
+def tribe_attacks(tribe):
+    """Yield a tribe's attacks."""
+    d, n, w, e, s, delta_d, delta_p, delta_s = tribe
+    for _ in range(n):
+        yield Attack(d, w, e, s)
+        d += delta_d
+        w += delta_p
+        e += delta_p
+        s += delta_s
+
+
+def merge(iterators):
+    """Make a lazy sorted iterator that merges lazy sorted iterators."""
+    streams = [(next(it), id(it), it) for it in iterators]
+    heapq.heapify(streams)
+    while streams:
+        val, i, it = streams[0]
+        for next_val in it:
+            heapq.heapreplace(streams, (next_val, i, it))
+            break
+        else:
+            heapq.heappop(streams)
+        yield val
+
+
+def bench_solve(count):
+    """Compare solving from attack tuples and from arrays over count tribes."""
+    print("solve over %d one-attack tribes: seconds" % count)
+    tribes = random_tribes(count)
+    by_tuples = timed(tuple_solve, tribes)
+    by_arrays = timed(greatwall.solve, tribes)
+    assert tuple_solve(tribes[: 10**4]) == greatwall.solve(tribes[: 10**4])
+    print(
+        "  tuples %.2f, arrays %.2f (%.2fx)"
+        % (by_tuples, by_arrays, by_tuples / by_arrays)
+    )
+
+
+def main():
+    bench_solve(int(sys.argv[1]) if len(sys.argv) > 1 else 10**6)
+
+
+if __name__ == "__main__":
+    main()
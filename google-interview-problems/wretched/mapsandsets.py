@@ -41,28 +41,89 @@ maintaining a set of indexes for each value X.  To remove a value X,
 then, we can look up one of its indexes in the hash table, swap the
 array's final value into that index's slot, and then shrink the array
 by one slot.  This gives us constant-time removal while keeping the
-array free of holes, making random selection trivial.  The following
-Python code gives one possible implementation.
+array free of holes, making random selection trivial.
+
+When the bag holds many copies of few values, however, one array slot
+per copy wastes memory.  So the code below run-length encodes the
+bag: the array holds each distinct value once, alongside its count,
+and the hash table maps each value to its single index.  Inserting or
+removing a copy of a value that stays in the bag just adjusts its
+count; only the first insertion and final removal of a value touch
+the array, by appending or by swapping with the final slot as above.
+
+Random selection must now weight each value by its count.  Walker's
+alias method does that in O(1) time, but its table takes O(K) time to
+build for K distinct values.  So the table is built lazily, the first
+time a random value is needed, from the counts at that time.  Later
+count changes are absorbed by rejection: a value drawn from the table
+is accepted with probability proportional to its current count over
+its count when the table was built.  Only when values enter or leave
+the bag, or when the counts drift far enough that a draw is rejected
+more often than not, is the table rebuilt.  The following Python code
+gives one possible implementation.
+
+A GrabBag isn't safe to share among threads: two interleaved removals
+can swap values into each other's slots.  Guarding the bag with one
+lock makes it safe, but then every thread waits on that lock.  So
+ShardedGrabBag spreads values over several GrabBags by hash, each
+guarded by its own lock.  Random selection picks a shard with
+probability proportional to its size and then a value within it.
+Membership tests take no lock at all, since a value is in the bag
+exactly when it's a key of its shard's hash table, and a single
+lookup in a Python dict is atomic.  AsyncGrabBag wraps a
+ShardedGrabBag for use by asyncio tasks, acquiring its locks without
+blocking the event loop.
 
 Tom Moertel <tom@moertel.com>
 August 2013
 
 """
 
+from array import array
+import asyncio
+import bisect
 import collections
+import contextlib
+import itertools
 import random
+import threading
 
 
 class GrabBag(object):
     """A bag that supports random selection."""
 
     def __init__(self):
-        self.vals = []  # all values in the bag
-        self.val_locs = collections.defaultdict(set)  # each value's indexes
+        self.vals = []  # each distinct value in the bag
+        self.counts = array("q")  # each value's count
+        self.val_locs = {}  # each value's index
+        self.size = 0  # the total of the counts
+        self._alias_table = None  # (probs, aliases, counts, total, ratio)
+
+    def __len__(self):
+        return self.size
 
     def insert(self, x):
-        self.val_locs[x].add(len(self.vals))
-        self.vals.append(x)
+        self._insert(x, 1)
+
+    def insert_many(self, xs):
+        for x, count in collections.Counter(xs).items():
+            self._insert(x, count)
+
+    def _insert(self, x, count):
+        if x in self.val_locs:
+            loc = self.val_locs[x]
+            self.counts[loc] += count
+            if self._alias_table is not None:
+                probs, aliases, counts, total, ratio = self._alias_table
+                if self.counts[loc] > ratio * counts[loc]:
+                    ratio = self.counts[loc] / counts[loc]
+                    self._alias_table = probs, aliases, counts, total, ratio
+        else:
+            self.val_locs[x] = len(self.vals)
+            self.vals.append(x)
+            self.counts.append(count)
+            self._alias_table = None
+        self.size += count
 
     def __contains__(self, x):
         return x in self.val_locs
@@ -70,25 +131,208 @@ class GrabBag(object):
     def random_val(self):
         if not self.vals:
             raise ValueError("bag is empty")
-        return random.choice(self.vals)
+        table = self._alias_table
+        # A draw is accepted with probability size / (ratio * total), where
+        # ratio bounds how far any count has grown since the table was built.
+        if table is None or table[4] * table[3] > 2 * self.size:
+            table = self._alias_table = self._build_alias_table()
+        probs, aliases, counts, _total, ratio = table
+        while True:
+            i = random.randrange(len(probs))
+            if random.random() >= probs[i]:
+                i = aliases[i]
+            if random.random() * ratio * counts[i] < self.counts[i]:
+                return self.vals[i]
+
+    def _build_alias_table(self):
+        # Walker's alias method, as arranged by Vose.
+        k, counts = len(self.counts), array("q", self.counts)
+        probs = array("d", (c * k / self.size for c in counts))
+        aliases = array("q", range(k))
+        small = [i for i in range(k) if probs[i] < 1.0]
+        large = [i for i in range(k) if probs[i] >= 1.0]
+        while small and large:
+            i, j = small.pop(), large[-1]
+            aliases[i] = j
+            probs[j] -= 1.0 - probs[i]
+            if probs[j] < 1.0:
+                small.append(large.pop())
+        for i in small + large:  # What's left is 1.0 but for rounding.
+            probs[i] = 1.0
+        return probs, aliases, counts, self.size, 1.0
 
     def remove(self, x):
         if x not in self.val_locs:
             raise ValueError("the value is not in the bag")
+        self._remove(x, 1)
+
+    def remove_many(self, xs):
+        xs = collections.Counter(xs)
+        for x, count in xs.items():
+            if x not in self.val_locs or self.counts[self.val_locs[x]] < count:
+                raise ValueError("the values are not in the bag")
+        for x, count in xs.items():
+            self._remove(x, count)
+
+    def _remove(self, x, count):
+        x_loc = self.val_locs[x]
+        self.counts[x_loc] -= count
+        self.size -= count
+        if self.counts[x_loc]:
+            return
         # swap x with the final value in the array
-        x_loc = self.val_locs[x].pop()  # get an x's loc
         final_loc = len(self.vals) - 1
         if x_loc != final_loc:
             y = self.vals[final_loc]
-            self.vals[final_loc] = x
             self.vals[x_loc] = y
-            self.val_locs[y].remove(final_loc)
-            self.val_locs[y].add(x_loc)
-        # truncate the array to remove the final value (now x)
+            self.counts[x_loc] = self.counts[final_loc]
+            self.val_locs[y] = x_loc
+        # truncate the arrays to remove the final value (now x)
         self.vals.pop()
-        # remove x's array-index set if it's empty
-        if not self.val_locs[x]:
-            del self.val_locs[x]
+        self.counts.pop()
+        del self.val_locs[x]
+        self._alias_table = None
 
     def __repr__(self):
-        return "GrabBag(vals={}, val_locs={})".format(self.vals, self.val_locs)
+        return "GrabBag(vals={}, counts={})".format(self.vals, list(self.counts))
+
+
+class ShardedGrabBag(object):
+    """A GrabBag that threads can share, sharded to spread lock contention."""
+
+    def __init__(self, num_shards=16):
+        self.shards = [GrabBag() for _ in range(num_shards)]
+        self.locks = [threading.Lock() for _ in range(num_shards)]
+
+    def _shard_index(self, x):
+        return hash(x) % len(self.shards)
+
+    def _random_shard_index(self):
+        # The sizes are read without locks, so under concurrent updates
+        # the chosen shard may be empty by the time it's locked.
+        sizes = list(itertools.accumulate(len(shard) for shard in self.shards))
+        if not sizes[-1]:
+            raise ValueError("bag is empty")
+        return bisect.bisect_right(sizes, random.randrange(sizes[-1]))
+
+    def _group_by_shard(self, xs):
+        by_shard = collections.defaultdict(list)
+        for x in xs:
+            by_shard[self._shard_index(x)].append(x)
+        return sorted(by_shard.items())  # Lock shards in index order.
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    def __contains__(self, x):
+        return x in self.shards[self._shard_index(x)].val_locs
+
+    def insert(self, x):
+        i = self._shard_index(x)
+        with self.locks[i]:
+            self.shards[i].insert(x)
+
+    def insert_many(self, xs):
+        for i, shard_xs in self._group_by_shard(xs):
+            with self.locks[i]:
+                self.shards[i].insert_many(shard_xs)
+
+    def remove(self, x):
+        i = self._shard_index(x)
+        with self.locks[i]:
+            self.shards[i].remove(x)
+
+    def remove_many(self, xs):
+        by_shard = self._group_by_shard(xs)
+        with contextlib.ExitStack() as stack:
+            for i, _ in by_shard:
+                stack.enter_context(self.locks[i])
+            _remove_many_from_shards(self.shards, by_shard)
+
+    def random_val(self):
+        while True:
+            i = self._random_shard_index()
+            with self.locks[i]:
+                if self.shards[i]:
+                    return self.shards[i].random_val()
+
+    def __repr__(self):
+        return "ShardedGrabBag(shards={})".format(self.shards)
+
+
+def _remove_many_from_shards(shards, by_shard):
+    """Remove the values from their shards, all or none."""
+    for i, shard_xs in by_shard:
+        for x, count in collections.Counter(shard_xs).items():
+            if x not in shards[i] or shards[i].counts[shards[i].val_locs[x]] < count:
+                raise ValueError("the values are not in the bag")
+    for i, shard_xs in by_shard:
+        shards[i].remove_many(shard_xs)
+
+
+class AsyncGrabBag(object):
+    """A ShardedGrabBag for asyncio tasks.
+
+    Rather than hand each operation to a thread, a task polls for the
+    locks it needs, yielding to the event loop between tries.  Most
+    updates hold a shard's lock for O(1) time, but insert_many and
+    remove_many hold it for O(m) time for the m values in that shard,
+    and random_val holds it for O(K) time when it must rebuild the
+    shard's alias table over K distinct values.  Those longer holds
+    only lengthen the polling, which backs off to max_delay seconds
+    between tries, so a waiting task never blocks the event loop and
+    costs it at most one wakeup per max_delay.
+
+    """
+
+    def __init__(self, bag=None, max_delay=0.001):
+        self.bag = ShardedGrabBag() if bag is None else bag
+        self.max_delay = max_delay
+
+    @contextlib.asynccontextmanager
+    async def _locked(self, *indexes):
+        acquired = []
+        try:
+            for i in indexes:
+                lock, delay = self.bag.locks[i], 0
+                while not lock.acquire(blocking=False):
+                    await asyncio.sleep(delay)
+                    delay = min(2 * delay or 1e-6, self.max_delay)
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    def __len__(self):
+        return len(self.bag)
+
+    def __contains__(self, x):
+        return x in self.bag
+
+    async def insert(self, x):
+        i = self.bag._shard_index(x)
+        async with self._locked(i):
+            self.bag.shards[i].insert(x)
+
+    async def insert_many(self, xs):
+        for i, shard_xs in self.bag._group_by_shard(xs):
+            async with self._locked(i):
+                self.bag.shards[i].insert_many(shard_xs)
+
+    async def remove(self, x):
+        i = self.bag._shard_index(x)
+        async with self._locked(i):
+            self.bag.shards[i].remove(x)
+
+    async def remove_many(self, xs):
+        by_shard = self.bag._group_by_shard(xs)
+        async with self._locked(*(i for i, _ in by_shard)):
+            _remove_many_from_shards(self.bag.shards, by_shard)
+
+    async def random_val(self):
+        while True:
+            i = self.bag._random_shard_index()
+            async with self._locked(i):
+                if self.bag.shards[i]:
+                    return self.bag.shards[i].random_val()
@@ -1,4 +1,9 @@
-from mapsandsets import GrabBag
+import asyncio
+import collections
+import random
+import threading
+
+from mapsandsets import AsyncGrabBag, GrabBag, ShardedGrabBag
 
 import pytest
 
@@ -40,3 +45,133 @@ def test_grabbag():
 
         # Leave one x around for the next round of tests on x + 1.
         b.insert(x)
+
+
+def test_grabbag_stores_each_value_once():
+    b = GrabBag()
+    b.insert_many([0] * 10**5 + [1] * 10)
+    b.insert(1)
+    assert len(b) == 10**5 + 11
+    assert sorted(b.vals) == [0, 1]
+
+    b.remove_many([1] * 11)
+    assert 1 not in b
+    assert b.vals == [0]
+    assert len(b) == 10**5
+
+
+def test_grabbag_remove_many_is_all_or_nothing():
+    b = GrabBag()
+    b.insert_many("aab")
+    pytest.raises(ValueError, lambda: b.remove_many("aaa"))
+    pytest.raises(ValueError, lambda: b.remove_many("ac"))
+    assert len(b) == 3
+
+    b.remove_many("ba")
+    assert "b" not in b
+    assert b.random_val() == "a"
+
+
+def test_grabbag_random_vals_are_weighted_by_count():
+    random.seed(3)
+    b = GrabBag()
+    b.insert_many("a" * 6 + "b" * 3 + "c")
+
+    def frequencies(n=20000):
+        counts = collections.Counter(b.random_val() for _ in range(n))
+        return {x: count / n for x, count in counts.items()}
+
+    def assert_near(freqs, expected):
+        assert freqs.keys() == expected.keys()
+        for x, p in expected.items():
+            assert abs(freqs[x] - p) < 0.02, (x, freqs[x], p)
+
+    assert_near(frequencies(), {"a": 0.6, "b": 0.3, "c": 0.1})
+
+    # Count changes since the alias table was built must be honored.
+    b.insert_many("c" * 5)
+    b.remove_many("aaaa")
+    assert_near(frequencies(), {"a": 2 / 11, "b": 3 / 11, "c": 6 / 11})
+
+    # Values leaving the bag must be honored, too.
+    b.remove_many("aa")
+    assert_near(frequencies(), {"b": 1 / 3, "c": 2 / 3})
+
+
+def test_sharded_grabbag():
+    b = ShardedGrabBag(num_shards=4)
+    pytest.raises(ValueError, b.random_val)
+    b.insert_many(range(100))
+    b.insert(0)
+    assert len(b) == 101
+    assert 0 in b and 100 not in b
+    assert set(b.random_val() for _ in range(2000)) == set(range(100))
+
+    pytest.raises(ValueError, lambda: b.remove_many([0, 1, 1]))
+    assert len(b) == 101
+    b.remove_many(range(1, 100))
+    b.remove(0)
+    assert [b.random_val() for _ in range(10)] == [0] * 10
+
+
+def test_sharded_grabbag_under_concurrent_updates():
+    b = ShardedGrabBag(num_shards=4)
+    errors = []
+
+    def worker(k):
+        try:
+            for n in range(2000):
+                x = (k, n % 7)
+                b.insert(x)
+                b.insert_many([x, (k, "y")])
+                assert x in b
+                b.remove_many([x, (k, "y")])
+                b.random_val()
+                b.remove(x)
+        except Exception as e:  # Surface failures in the main thread.
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert len(b) == 0
+    for shard in b.shards:
+        assert shard.vals == [] and shard.val_locs == {}
+
+
+def test_async_grabbag():
+    async def worker(b, k):
+        for n in range(200):
+            await b.insert_many([(k, n), (k, n)])
+            await b.remove((k, n))
+            assert (k, n) in b
+            await b.random_val()
+            if n % 2:
+                await b.remove_many([(k, n)])
+
+    async def run():
+        b = AsyncGrabBag(ShardedGrabBag(num_shards=2))
+        await asyncio.gather(*(worker(b, k) for k in range(10)))
+        return b
+
+    b = asyncio.run(run())
+    assert len(b) == 10 * 100
+    assert all(n % 2 == 0 for _k, n in b.bag.shards[0].vals)
+
+
+def test_async_grabbag_waits_for_locks_without_blocking():
+    b = AsyncGrabBag(ShardedGrabBag(num_shards=1))
+
+    async def run():
+        b.bag.locks[0].acquire()  # As if another thread were updating.
+        insert = asyncio.ensure_future(b.insert("x"))
+        await asyncio.sleep(0.01)  # The loop still runs other tasks.
+        assert not insert.done() and "x" not in b
+        b.bag.locks[0].release()
+        await insert
+        assert "x" in b
+
+    asyncio.run(run())
@@ -11,23 +11,61 @@ Walker, A. J. An efficient method for generating discrete random variables
 with general distributions. ACM Transactions on Mathematical Software,
 3(3):253–256, 1977. DOI: 10.1145/355744.355749.
 
+For distributions whose weights change over time, the module also provides
+`DynamicDiscreteRandomVariable`, which supports weight updates, inserts,
+deletes, and draws in O(log n) time by using a Fenwick tree of weights:
+
+Fenwick, P. M. A new data structure for cumulative frequency tables.
+Software: Practice and Experience, 24(3):327–336, 1994.
+DOI: 10.1002/spe.4380240306.
+
 """
 
+from array import array
 from collections.abc import Iterable
 import collections
+import itertools
+import pickle
 import random
+import struct
 from typing import Any
 
+try:
+    import numpy
+except ImportError:
+    numpy = None  # Optional; `draw_many` can use NumPy generators if installed.
+
 # Internally, we pack two weighted values into a block of fixed total weight,
 # where the low value occupies the bottom `low_weight / (low_weight +
 # high_weight)` share of the block. (Since all blocks have the same fixed total
 # weight, we don't need to store the high weight; it is known implicitly.)
 TwoValues = collections.namedtuple("TwoValue", "low_weight, low_value, high_value")
 
+# Blocks are stored as a struct of parallel arrays of this type.
+_ARRAY_TYPECODE = "q"
+_ARRAY_LIMIT = 2**63
+
+# Layout of the header that `to_buffer` writes: a magic number and the block
+# count, the mean weight, and the length of the pickled value table.
+_BUFFER_HEADER = struct.Struct("=8sqqq")
+_BUFFER_MAGIC = b"DRVAR\x00\x00\x01"
+
 
 class DiscreteRandomVariable:
     """Represents a discrete random variable that you can draw values from."""
 
+    # The blocks are stored column-wise: block x has weight `low_weights[x]` for
+    # the value `values[low_indices[x]]`, and the remainder of the block goes to
+    # the value `values[high_indices[x]]`, unless `high_indices[x]` is -1.
+    __slots__ = (
+        "mean_weight",
+        "values",
+        "low_weights",
+        "low_indices",
+        "high_indices",
+        "_numpy_values",
+    )
+
     def __init__(self, value_and_weight_pairs: Iterable[tuple[Any, int]]):
         """Creates a discrete random variable.
 
@@ -40,64 +78,88 @@ class DiscreteRandomVariable:
         total weight of the pairs must be greater than zero.
 
         GUARANTEED: Constructing the instance takes time and memory linear in
-        the length of the pairs series.
+        the length of the pairs series. Unless the weights are too large to fit
+        into 64-bit integers, the blocks are stored in typed arrays, taking 24
+        bytes per value, plus the table of values itself.
 
         """
-        # Convert the pairs into a list we can iterate over repeatedly.
-        value_and_weight_pairs = list(value_and_weight_pairs)
-
-        # Weights must be non-negative integers.
-        for _, w in value_and_weight_pairs:
+        # Read the pairs in a single pass into a table of values and a parallel
+        # array of weights. Weights must be non-negative integers.
+        self.values = []
+        weights = array(_ARRAY_TYPECODE)
+        for v, w in value_and_weight_pairs:
             if not isinstance(w, int):
                 raise TypeError("weights must be int values")
             if w < 0:
                 raise ValueError("weights cannot be less than 0")
+            self.values.append(v)
+            if w >= _ARRAY_LIMIT and isinstance(weights, array):
+                weights = list(weights)  # Too large for a typed array.
+            weights.append(w)
 
         # The distribution must have a positive total weight.
-        if not any(w > 0 for _, w in value_and_weight_pairs):
+        self.mean_weight = sum(weights)
+        if self.mean_weight == 0:
             raise ValueError("at least one weight must be greater than 0")
 
         # Rescale all weights so that they can be evenly divided by the count of
         # pairs. This will guarantee that if the weights have integer values,
         # the mean weight will have an integer value also. Note that the mean
-        # after rescaling is equal to the total before rescaling.
-        self.mean_weight = sum(w for _, w in value_and_weight_pairs)
-        n = len(value_and_weight_pairs)
-        value_and_weight_pairs = [(v, w * n) for v, w in value_and_weight_pairs]
+        # after rescaling is equal to the total before rescaling. (We rescale in
+        # place, giving up on typed arrays if the rescaled weights won't fit.)
+        n = len(weights)
+        if max(max(weights) * n, self.mean_weight) >= _ARRAY_LIMIT:
+            weights = list(weights)
+        for i in range(n):
+            weights[i] *= n
 
-        # Partition the pairs by whether they are below the mean or not.
-        def is_below_mean(pair):
-            _, weight = pair
-            return weight < self.mean_weight
+        # Partition the values by whether their weights are below the mean or
+        # not. We keep only the values' indices.
+        mean = self.mean_weight
+        below = array(_ARRAY_TYPECODE)
+        not_below = array(_ARRAY_TYPECODE)
+        for i, w in enumerate(weights):
+            (below if w < mean else not_below).append(i)
 
-        below_pairs = [vw for vw in value_and_weight_pairs if is_below_mean(vw)]
-        not_below_pairs = [vw for vw in value_and_weight_pairs if not is_below_mean(vw)]
-
-        # Repack the weighted pairs into a single array of blocks, each having a
-        # weight of exactly the mean and each representing one or two of the
+        # Repack the weighted values into a single array of blocks, each having
+        # a weight of exactly the mean and each representing one or two of the
         # original values.
-        self.packed_blocks = []
-        while below_pairs:
+        self.low_weights = array(_ARRAY_TYPECODE) if isinstance(weights, array) else []
+        self.low_indices = array(_ARRAY_TYPECODE)
+        self.high_indices = array(_ARRAY_TYPECODE)
+        while below:
             # While there are values having a weight w_low less than the mean,
             # there must exist values having a weight w_high greater than the
             # mean. We combine one of each to form a two-value block having a
             # weight w_low + w_high, which must also be greater than the mean.
-            v_low, w_low = below_pairs.pop()
-            v_high, w_high = not_below_pairs.pop()
-            self.packed_blocks.append(TwoValues(w_low, v_low, v_high))
+            i_low = below.pop()
+            i_high = not_below.pop()
+            self.low_weights.append(weights[i_low])
+            self.low_indices.append(i_low)
+            self.high_indices.append(i_high)
 
             # We trim off the excess weight and add it back to the list of
-            # below-mean or not-below-mean pairs, as its weight demands.
-            w_leftover = w_low + w_high - self.mean_weight
-            (below_pairs if w_leftover < self.mean_weight else not_below_pairs).append(
-                (v_high, w_leftover)
-            )
+            # below-mean or not-below-mean values, as its weight demands.
+            weights[i_high] += weights[i_low] - mean
+            (below if weights[i_high] < mean else not_below).append(i_high)
 
-        # When no more below-mean pairs exist, the `not_below_pairs` list may
-        # still contain some pairs having a weight of exactly the mean. These we
-        # add to the packed-block array as degenerate two-value blocks, each
-        # having a low value that occupies the entire block.
-        self.packed_blocks.extend(TwoValues(w, v, None) for v, w in not_below_pairs)
+        # When no more below-mean values exist, the `not_below` list may still
+        # contain some values having a weight of exactly the mean. These we add
+        # to the block arrays as degenerate two-value blocks, each having a low
+        # value that occupies the entire block.
+        for i in not_below:
+            self.low_weights.append(mean)
+            self.low_indices.append(i)
+            self.high_indices.append(-1)
+
+    @property
+    def packed_blocks(self) -> list[TwoValues]:
+        """The blocks as a list of `TwoValues`, for inspection."""
+        values = self.values + [None]  # Index -1 maps to None.
+        return [
+            TwoValues(w, values[i], values[j])
+            for w, i, j in zip(self.low_weights, self.low_indices, self.high_indices)
+        ]
 
     def draw(self, randrange=random.randrange):
         """Returns a value from the distribution at random.
@@ -121,12 +183,312 @@ class DiscreteRandomVariable:
         # random numbers -- one for the x coordinate in [0, n), and one for the
         # y in [0, u) -- we instead generate a single number in [0, n * u) and
         # unpack it into the dart's x-y coordinates.
-        n = len(self.packed_blocks)
+        n = len(self.low_weights)
         dart_combined_coordinates = randrange(n * self.mean_weight)
         x = dart_combined_coordinates // self.mean_weight
         y = dart_combined_coordinates % self.mean_weight
-        # Now that we know where the dart hit, we determine which block it selected.
-        block = self.packed_blocks[x]
-        # ... and, within that block, which of the block's two values the dart hit.
-        value = block.low_value if y < block.low_weight else block.high_value
-        return value
+        # Now that we know where the dart hit, we determine which block it selected
+        # and, within that block, which of the block's two values the dart hit.
+        if y < self.low_weights[x]:
+            return self.values[self.low_indices[x]]
+        return self.values[self.high_indices[x]]
+
+    def draw_many(self, n: int, rng=None) -> list:
+        """Returns a list of `n` values drawn independently from the distribution.
+
+        This is the batch equivalent of calling `draw` `n` times, minus most of
+        the per-call overhead: all of the darts are generated in bulk from
+        random bytes and then resolved against the block arrays.
+
+        Args:
+          n: The number of values to draw.
+          rng: (optional) The source of randomness: a `random.Random` instance,
+            or, if NumPy is installed, a `numpy.random.Generator`. Defaults to
+            the `random` module's shared generator. Given a NumPy generator,
+            the darts are resolved with vectorized NumPy operations, and the
+            values are returned in a NumPy array of dtype `object`.
+
+        GUARANTEED: Each value is drawn with exactly its probability under the
+        distribution. (Darts are drawn by rejection sampling from uniform random
+        bits, so no modulo bias is introduced.)
+
+        """
+        if n < 0:
+            raise ValueError("cannot draw a negative number of values")
+        u = self.mean_weight
+        num_darts = len(self.low_weights) * u
+        if numpy is not None and isinstance(rng, numpy.random.Generator):
+            if num_darts >= _ARRAY_LIMIT:
+                raise ValueError("distribution is too large for NumPy draws")
+            x, y = numpy.divmod(rng.integers(num_darts, size=n, dtype=numpy.int64), u)
+            low_weights, low_indices, high_indices = (
+                numpy.frombuffer(a, dtype=numpy.int64)
+                for a in (self.low_weights, self.low_indices, self.high_indices)
+            )
+            indices = numpy.where(y < low_weights[x], low_indices[x], high_indices[x])
+            return self._values_as_numpy_array()[indices]
+        darts = _random_ints_below(num_darts, n, rng or random)
+        values = self.values
+        low_weights = self.low_weights
+        low_indices = self.low_indices
+        high_indices = self.high_indices
+        return [
+            values[low_indices[x] if y < low_weights[x] else high_indices[x]]
+            for x, y in map(divmod, darts, itertools.repeat(u))
+        ]
+
+    def _values_as_numpy_array(self):
+        try:
+            return self._numpy_values
+        except AttributeError:
+            # Assign items one at a time so NumPy won't unpack sequence values.
+            self._numpy_values = numpy.empty(len(self.values), dtype=object)
+            for i, v in enumerate(self.values):
+                self._numpy_values[i] = v
+            return self._numpy_values
+
+    def __getstate__(self):
+        # Copy any blocks viewed in a buffer (see `from_buffer`) into arrays.
+        def picklable(blocks):
+            if isinstance(blocks, memoryview):
+                return array(_ARRAY_TYPECODE, blocks)
+            return blocks
+
+        return (
+            self.mean_weight,
+            self.values,
+            picklable(self.low_weights),
+            picklable(self.low_indices),
+            picklable(self.high_indices),
+        )
+
+    def __setstate__(self, state):
+        (
+            self.mean_weight,
+            self.values,
+            self.low_weights,
+            self.low_indices,
+            self.high_indices,
+        ) = state
+
+    def to_buffer(self) -> bytes:
+        """Returns the variable serialized into a flat buffer.
+
+        The buffer holds a header, the three block arrays in native 64-bit
+        format, and then the pickled table of values. Put it into shared memory
+        (e.g., `multiprocessing.shared_memory.SharedMemory`) and have worker
+        processes call `from_buffer` on it to share one copy of the blocks.
+
+        REQUIRED: The weights must fit into 64-bit integer arrays.
+
+        """
+        if not isinstance(self.low_weights, (array, memoryview)):
+            raise ValueError("weights are too large to export to a buffer")
+        pickled_values = pickle.dumps(self.values, pickle.HIGHEST_PROTOCOL)
+        header = _BUFFER_HEADER.pack(
+            _BUFFER_MAGIC, len(self.low_weights), self.mean_weight, len(pickled_values)
+        )
+        return b"".join(
+            [
+                header,
+                bytes(self.low_weights),
+                bytes(self.low_indices),
+                bytes(self.high_indices),
+                pickled_values,
+            ]
+        )
+
+    @classmethod
+    def from_buffer(cls, buffer) -> "DiscreteRandomVariable":
+        """Returns a variable that reads its blocks from a `to_buffer` buffer.
+
+        The block arrays are not copied: the returned variable views them in
+        place, so the buffer must outlive the variable and must not change. The
+        table of values is unpickled into a private copy.
+
+        """
+        view = memoryview(buffer).cast("B")
+        magic, num_blocks, mean_weight, pickled_len = _BUFFER_HEADER.unpack_from(view)
+        if magic != _BUFFER_MAGIC:
+            raise ValueError("buffer does not hold a DiscreteRandomVariable")
+        self = cls.__new__(cls)
+        self.mean_weight = mean_weight
+        offset = _BUFFER_HEADER.size
+        size = num_blocks * array(_ARRAY_TYPECODE).itemsize
+        self.low_weights, self.low_indices, self.high_indices = (
+            view[offset + k * size : offset + (k + 1) * size].cast(_ARRAY_TYPECODE)
+            for k in range(3)
+        )
+        offset += 3 * size
+        self.values = pickle.loads(view[offset : offset + pickled_len])
+        return self
+
+
+class DynamicDiscreteRandomVariable:
+    """Represents a discrete random variable whose weights you can change.
+
+    Unlike `DiscreteRandomVariable`, whose distribution is fixed when it is
+    constructed, this variable lets you update, insert, and remove weighted
+    values in O(log n) time. Drawing a value also takes O(log n) time.
+
+    Weights follow the same contract as for `DiscreteRandomVariable`: they must
+    be integer values, at least zero. Values must be hashable, since they are
+    used to look up their weights.
+
+    """
+
+    __slots__ = ("_slots", "_values", "_weights", "_tree", "_free")
+
+    def __init__(self, value_and_weight_pairs: Iterable[tuple[Any, int]] = ()):
+        """Creates a dynamic discrete random variable.
+
+        Args:
+          value_and_weight_pairs: (optional) An iterable series of (value,
+            weight) pairs specifying the initial distribution. Later pairs
+            replace the weights of earlier pairs having the same value.
+
+        GUARANTEED: Constructing the instance takes time and memory linear in
+        the length of the pairs series.
+
+        """
+        self._slots = {}  # Maps each value to its slot in the arrays below.
+        self._values = []  # Maps each slot to its value.
+        self._weights = []  # Maps each slot to its weight; free slots are 0.
+        self._free = []  # Free slots.
+        for value, weight in value_and_weight_pairs:
+            _check_weight(weight)
+            slot = self._slots.setdefault(value, len(self._values))
+            if slot == len(self._values):
+                self._values.append(value)
+                self._weights.append(weight)
+            else:
+                self._weights[slot] = weight
+        self._rebuild(len(self._values))
+
+    def __len__(self):
+        """Returns the count of values, including those having zero weight."""
+        return len(self._slots)
+
+    def __contains__(self, value):
+        return value in self._slots
+
+    @property
+    def total_weight(self) -> int:
+        """The total weight of all values."""
+        return self._tree[-1]
+
+    def weight(self, value) -> int:
+        """Returns the weight of `value`, or 0 if it's not in the distribution."""
+        slot = self._slots.get(value)
+        return 0 if slot is None else self._weights[slot]
+
+    def set_weight(self, value, weight: int):
+        """Sets the weight of `value`, adding `value` if needed, in O(log n) time."""
+        _check_weight(weight)
+        slot = self._slots.get(value)
+        if slot is None:
+            if not self._free:
+                self._rebuild(2 * len(self._values))
+            slot = self._slots[value] = self._free.pop()
+            self._values[slot] = value
+        self._add(slot, weight - self._weights[slot])
+
+    def remove(self, value):
+        """Removes `value` from the distribution in O(log n) time.
+
+        Raises KeyError if `value` is not in the distribution.
+
+        """
+        slot = self._slots.pop(value)
+        self._add(slot, -self._weights[slot])
+        self._values[slot] = None
+        self._free.append(slot)
+
+    def draw(self, randrange=random.randrange):
+        """Returns a value from the distribution at random.
+
+        Args:
+          randrange: (optional) A function that when called with an integer
+            argument `n` returns a random integer from the set {0,1,2,...,n-1}.
+            Defaults to `random.randrange`. (See `DiscreteRandomVariable.draw`.)
+
+        REQUIRED: The total weight must be greater than zero.
+
+        GUARANTEED to call `randrange` exactly once, with the total weight as its
+        argument, and perform O(log n) work.
+
+        """
+        if self.total_weight == 0:
+            raise ValueError("cannot draw from a distribution with zero total weight")
+        # Find the slot whose range of cumulative weight contains the dart by
+        # descending the Fenwick tree from its root, one bit at a time.
+        dart = randrange(self.total_weight)
+        tree = self._tree
+        size = len(tree) - 1
+        position = 0
+        step = size
+        while step:
+            next_position = position + step
+            if next_position <= size and tree[next_position] <= dart:
+                position = next_position
+                dart -= tree[position]
+            step >>= 1
+        return self._values[position]
+
+    def _add(self, slot, delta):
+        """Adds `delta` to the weight of `slot`."""
+        self._weights[slot] += delta
+        tree = self._tree
+        i = slot + 1  # Fenwick trees are 1-based.
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _rebuild(self, capacity):
+        """Rebuilds the Fenwick tree with room for at least `capacity` slots."""
+        size = 1
+        while size < capacity:
+            size <<= 1
+        n = len(self._values)
+        self._free.extend(range(size - 1, n - 1, -1))
+        self._values.extend([None] * (size - n))
+        self._weights.extend([0] * (size - n))
+        # Build the tree in O(size) time by pushing each partial sum up to its
+        # parent. With a power-of-two size, tree[size] holds the total weight.
+        tree = self._tree = [0] + self._weights
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+
+
+def _check_weight(weight):
+    if not isinstance(weight, int):
+        raise TypeError("weights must be int values")
+    if weight < 0:
+        raise ValueError("weights cannot be less than 0")
+
+
+def _random_ints_below(limit: int, n: int, rng) -> list[int]:
+    """Returns a list of `n` uniformly random integers from {0,1,2,...,limit-1}.
+
+    Integers are unpacked in bulk from random bytes provided by `rng.randbytes`
+    and rejected if they are not below `limit`.
+
+    """
+    bits = max(1, (limit - 1).bit_length())
+    if bits > 64:
+        return [rng.randrange(limit) for _ in range(n)]
+    typecode = next(t for t in "BHIQ" if array(t).itemsize * 8 >= bits)
+    mask = (1 << bits) - 1
+    darts = []
+    while len(darts) < n:
+        # Each candidate is accepted with probability > 1/2. Ask for enough
+        # candidates to finish in one round, usually.
+        wanted = n - len(darts)
+        k = wanted + wanted * ((1 << bits) - limit) // limit + 16
+        candidates = array(typecode)
+        candidates.frombytes(rng.randbytes(k * candidates.itemsize))
+        darts.extend(d for d in (d & mask for d in candidates) if d < limit)
+    del darts[n:]
+    return darts
@@ -1,5 +1,8 @@
 import collections
-from discrete_random_variables import DiscreteRandomVariable
+from discrete_random_variables import (
+    DiscreteRandomVariable,
+    DynamicDiscreteRandomVariable,
+)
 
 
 def test_discrete_random_variables_raise_error_when_initialized_with_non_integer_weights():
@@ -84,3 +87,195 @@ def test_discrete_random_variables_exactly_represent_their_underlying_distributi
                 {value: num_values * weight for value, weight in values_and_weights}
             )
             assert actual_distribution == expected_distribution
+
+
+def test_draw_many_exactly_represents_the_underlying_distribution():
+    """This test is the batch analog of the previous test.
+
+    It relies on knowledge of `draw_many`'s internal logic, namely that it
+    unpacks darts from random bytes into the smallest array type that holds
+    `b` bits, masks off all but the low `b` bits, and rejects darts not less
+    than n * t, where `b` is the bit length of n * t - 1. By supplying bytes
+    that sweep over the range {0, 1, 2, ..., 2**b - 1}, we can observe
+    exactly the distribution represented by the random variable.
+
+    """
+    from array import array
+    from random import randint, shuffle
+
+    class SweepingRng:
+        def __init__(self, bits):
+            self.typecode = next(t for t in "BHIQ" if array(t).itemsize * 8 >= bits)
+            self.bits = bits
+            self.next = 0
+
+        def randbytes(self, k):
+            candidates = array(self.typecode)
+            for _ in range(k // candidates.itemsize):
+                candidates.append(self.next)
+                self.next = (self.next + 1) % 2**self.bits
+            return candidates.tobytes()
+
+    for num_values in range(1, 7):
+        for _ in range(20):
+            values = list(range(num_values))
+            shuffle(values)
+            weights = [randint(0, 200) for _ in range(num_values)]
+            weights[0] += 1  # Guarantee that total weight is greater than zero.
+            values_and_weights = list(zip(values, weights))
+            print(repr(values_and_weights))
+            random_variable = DiscreteRandomVariable(values_and_weights)
+            num_darts = num_values * sum(weights)
+            rng = SweepingRng(max(1, (num_darts - 1).bit_length()))
+            actual_distribution = collections.Counter(
+                random_variable.draw_many(num_darts, rng)
+            )
+            expected_distribution = collections.Counter(
+                {value: num_values * weight for value, weight in values_and_weights}
+            )
+            assert actual_distribution == expected_distribution
+
+
+def test_draw_many_draws_the_requested_number_of_values():
+    import random
+
+    random_variable = DiscreteRandomVariable([("a", 1), ("b", 0), ("c", 3)])
+    for n in [0, 1, 2, 1000]:
+        values = random_variable.draw_many(n, random.Random(n))
+        assert len(values) == n
+        assert set(values) <= {"a", "c"}
+    # Huge weights exercise the fallback for darts wider than 64 bits.
+    random_variable = DiscreteRandomVariable([("a", 2**80), ("b", 2**80)])
+    assert set(random_variable.draw_many(100)) == {"a", "b"}
+
+
+def test_draw_many_with_numpy_generator():
+    import pytest
+
+    numpy = pytest.importorskip("numpy")
+    random_variable = DiscreteRandomVariable([("a", 1), ((1, 2), 3)])
+    values = random_variable.draw_many(1000, numpy.random.default_rng(0))
+    assert len(values) == 1000
+    assert set(values) == {"a", (1, 2)}
+
+
+def _sweep(random_variable):
+    """Returns the values drawn for every possible dart, in order."""
+    num_darts = len(random_variable.low_weights) * random_variable.mean_weight
+    return [random_variable.draw(randrange=(lambda _: i)) for i in range(num_darts)]
+
+
+def test_discrete_random_variables_store_blocks_in_typed_arrays():
+    from array import array
+
+    random_variable = DiscreteRandomVariable([("a", 1), ("b", 2), ("c", 5)])
+    assert random_variable.values == ["a", "b", "c"]
+    for blocks in (
+        random_variable.low_weights,
+        random_variable.low_indices,
+        random_variable.high_indices,
+    ):
+        assert isinstance(blocks, array)
+        assert len(blocks) == 3
+    assert not hasattr(random_variable, "__dict__")
+    assert sorted(random_variable.packed_blocks, key=repr) == sorted(
+        [(3, "a", "c"), (6, "b", "c"), (8, "c", None)], key=repr
+    )
+
+
+def test_discrete_random_variables_support_weights_too_large_for_arrays():
+    random_variable = DiscreteRandomVariable([("a", 2**70), ("b", 3 * 2**70)])
+    assert isinstance(random_variable.low_weights, list)
+    assert set(random_variable.draw_many(100)) == {"a", "b"}
+
+
+def test_discrete_random_variables_can_be_pickled():
+    import pickle
+
+    random_variable = DiscreteRandomVariable([("a", 1), (("b", 2), 2), ("c", 5)])
+    copy = pickle.loads(pickle.dumps(random_variable))
+    assert copy.values == random_variable.values
+    assert _sweep(copy) == _sweep(random_variable)
+
+
+def test_discrete_random_variables_can_be_shared_through_buffers():
+    import pickle
+    from multiprocessing import shared_memory
+
+    import pytest
+
+    random_variable = DiscreteRandomVariable([("a", 1), (("b", 2), 2), ("c", 5)])
+    buffer = random_variable.to_buffer()
+    shm = shared_memory.SharedMemory(create=True, size=len(buffer))
+    try:
+        shm.buf[: len(buffer)] = buffer
+        shared = DiscreteRandomVariable.from_buffer(shm.buf)
+        assert isinstance(shared.low_weights, memoryview)
+        assert _sweep(shared) == _sweep(random_variable)
+        assert len(shared.draw_many(10)) == 10
+        # A variable viewing a buffer must still be picklable.
+        assert _sweep(pickle.loads(pickle.dumps(shared))) == _sweep(random_variable)
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+    with pytest.raises(ValueError):
+        DiscreteRandomVariable.from_buffer(b"\0" * 64)
+    with pytest.raises(ValueError):
+        DiscreteRandomVariable([("a", 2**70), ("b", 1)]).to_buffer()
+
+
+def test_dynamic_discrete_random_variables_exactly_represent_their_distributions():
+    """Like the static-variable test above, but under a series of random updates."""
+    from random import choice, randint
+
+    def check(random_variable, weights):
+        total_weight = sum(weights.values())
+        assert random_variable.total_weight == total_weight
+        assert len(random_variable) == len(weights)
+        actual_distribution = collections.Counter(
+            random_variable.draw(randrange=(lambda _: i)) for i in range(total_weight)
+        )
+        expected_distribution = collections.Counter(
+            {value: weight for value, weight in weights.items() if weight}
+        )
+        assert actual_distribution == expected_distribution
+
+    for _ in range(20):
+        weights = {value: randint(0, 20) for value in range(randint(0, 5))}
+        weights[-1] = randint(1, 20)  # Guarantee a positive total weight.
+        random_variable = DynamicDiscreteRandomVariable(weights.items())
+        check(random_variable, weights)
+        for _ in range(50):
+            action = randint(0, 2)
+            if action == 0 or len(weights) == 1:  # Insert or update.
+                value = randint(0, 30)
+                weights[value] = randint(0, 20)
+                random_variable.set_weight(value, weights[value])
+            else:
+                value = choice([v for v in weights if v != -1])
+                if action == 1:  # Remove.
+                    del weights[value]
+                    random_variable.remove(value)
+                else:  # Update to zero.
+                    weights[value] = 0
+                    random_variable.set_weight(value, 0)
+            assert random_variable.weight(value) == weights.get(value, 0)
+            assert (value in random_variable) == (value in weights)
+            check(random_variable, weights)
+
+
+def test_dynamic_discrete_random_variables_check_their_weights():
+    import pytest
+
+    with pytest.raises(TypeError):
+        DynamicDiscreteRandomVariable([("value_with_non_integer_weight", 1.23)])
+    with pytest.raises(ValueError):
+        DynamicDiscreteRandomVariable([("value_with_negative_weight", -2)])
+    random_variable = DynamicDiscreteRandomVariable()
+    with pytest.raises(ValueError):
+        random_variable.set_weight("value_with_negative_weight", -2)
+    with pytest.raises(ValueError):
+        random_variable.draw()  # Total weight is zero.
+    with pytest.raises(KeyError):
+        random_variable.remove("missing_value")
@@ -0,0 +1,212 @@
+"""Aggregates over sliding windows, such as rolling maxima, in amortized O(1) time.
+
+`SlidingWindowAggregate` is a FIFO queue that can report the aggregate of its
+elements under any associative operator, such as `max`, `min`, `operator.add`,
+or `math.gcd`. It uses the two-stack queue: elements are pushed onto a back
+stack, which keeps a running aggregate, and popped from a front stack, which
+keeps the aggregate of each element and all those behind it in the queue. When
+the front stack runs dry, the back stack is flipped onto it, computing the
+front's aggregates afresh. Each element is flipped once, so every operation
+takes amortized O(1) time and calls to the operator.
+
+For rolling maxima and minima, `sliding_max` and `sliding_min` need no operator
+calls at all. Over sequences, they keep a monotonic queue of the indices of the
+elements that could still become a window's extreme, as in EPI problem 8.1's
+MaxStack and Daily Coding Problem #18. Over NumPy arrays, they use the
+vectorized algorithm of van Herk and of Gil and Werman, which splits the array
+into k-length blocks and takes each window's extreme from a block's suffix
+extreme and the next block's prefix extreme:
+
+van Herk, M. A fast algorithm for local minimum and maximum filters on
+rectangular and octagonal kernels. Pattern Recognition Letters, 13(7):517–521,
+1992.
+
+Gil, J. and Werman, M. Computing 2-D min, median, and max filters. IEEE
+Transactions on Pattern Analysis and Machine Intelligence, 15(5):504–507, 1993.
+
+"""
+
+from array import array
+from collections.abc import Callable, Iterable, Sequence
+import collections
+import operator
+from typing import Any
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # Optional; `sliding_max` and `sliding_min` vectorize with it.
+
+
+class SlidingWindowAggregate:
+    """A FIFO queue that reports the aggregate of its elements."""
+
+    # The queue holds, from oldest to newest, `front_values` from last to first
+    # and then `back_values` from first to last. `front_aggregates[j]` is the
+    # aggregate of `front_values[j]` and the front values behind it in the
+    # queue, and `back_aggregate` is the aggregate of all the back values.
+    __slots__ = (
+        "op",
+        "front_values",
+        "front_aggregates",
+        "back_values",
+        "back_aggregate",
+    )
+
+    def __init__(self, op: Callable[[Any, Any], Any], typecode: str = None):
+        """Creates an empty queue.
+
+        Args:
+          op: The associative binary operator to aggregate elements with.
+          typecode: If given, the `array` typecode to store elements and
+            aggregates with, such as "q" or "d", instead of in lists.
+
+        """
+        self.op = op
+        new_buffer = list if typecode is None else lambda: array(typecode)
+        self.front_values = new_buffer()
+        self.front_aggregates = new_buffer()
+        self.back_values = new_buffer()
+        self.back_aggregate = None
+
+    def __len__(self):
+        return len(self.front_values) + len(self.back_values)
+
+    def push(self, x):
+        """Adds `x` to the back of the queue."""
+        if self.back_values:
+            self.back_aggregate = self.op(self.back_aggregate, x)
+        else:
+            self.back_aggregate = x
+        self.back_values.append(x)
+
+    def pop(self):
+        """Removes and returns the element at the front of the queue."""
+        if not self.front_values:
+            self._flip()
+        self.front_aggregates.pop()
+        return self.front_values.pop()
+
+    def aggregate(self):
+        """Returns the aggregate of the queue's elements, oldest first."""
+        if not self.front_values:
+            if not self.back_values:
+                raise IndexError("aggregate of an empty queue")
+            return self.back_aggregate
+        if not self.back_values:
+            return self.front_aggregates[-1]
+        return self.op(self.front_aggregates[-1], self.back_aggregate)
+
+    def _flip(self):
+        back_values, op = self.back_values, self.op
+        if not back_values:
+            raise IndexError("pop from an empty queue")
+        # Move the values newest first, so that the oldest ends up on top.
+        newer_values = reversed(back_values)
+        aggregate = next(newer_values)
+        self.front_values.append(aggregate)
+        self.front_aggregates.append(aggregate)
+        for x in newer_values:
+            aggregate = op(x, aggregate)
+            self.front_values.append(x)
+            self.front_aggregates.append(aggregate)
+        del back_values[:]
+
+
+def sliding_aggregates(
+    xs: Iterable, k: int, op: Callable[[Any, Any], Any], typecode: str = None
+):
+    """Yields the aggregate of each sequential k-length window of xs.
+
+    Args:
+      xs: The elements, in order.
+      k: The window length, at least 1.
+      op: The associative binary operator to aggregate elements with.
+      typecode: If given, the `array` typecode to buffer the window with.
+
+    GUARANTEED: Takes O(len(xs)) time, calls to `op`, and O(k) memory.
+
+    """
+    if k < 1:
+        raise ValueError("window length k=%r must be at least 1" % (k,))
+    window = SlidingWindowAggregate(op, typecode)
+    for x in xs:
+        window.push(x)
+        if len(window) > k:
+            window.pop()
+        if len(window) == k:
+            yield window.aggregate()
+
+
+def sliding_max(xs: Sequence, k: int, chunk_size: int = 2**20):
+    """Returns the maximum of each sequential k-length window of xs.
+
+    Args:
+      xs: The elements. If NumPy is installed and xs is a NumPy array, the
+        maxima are computed by vectorized operations and returned as a NumPy
+        array. Otherwise, they are returned as a list, or as an `array` of the
+        same typecode if xs is an `array`.
+      k: The window length, at least 1.
+      chunk_size: For NumPy arrays, how many maxima to compute at a time,
+        bounding the temporary memory used to O(chunk_size + k) elements.
+
+    GUARANTEED: Takes O(len(xs)) time.
+
+    """
+    return _sliding_extremes(xs, k, chunk_size, operator.ge, "maximum")
+
+
+def sliding_min(xs: Sequence, k: int, chunk_size: int = 2**20):
+    """Returns the minimum of each sequential k-length window of xs.
+
+    See `sliding_max` for details.
+
+    """
+    return _sliding_extremes(xs, k, chunk_size, operator.le, "minimum")
+
+
+def _sliding_extremes(xs, k, chunk_size, dominates, ufunc_name):
+    if k < 1:
+        raise ValueError("window length k=%r must be at least 1" % (k,))
+    if numpy is not None and isinstance(xs, numpy.ndarray):
+        ufunc = getattr(numpy, ufunc_name)
+        return _numpy_sliding_extremes(xs, k, chunk_size, ufunc)
+    extremes = array(xs.typecode) if isinstance(xs, array) else []
+    # The window holds the indices of the elements that no newer element
+    # dominates, so their values decrease (for max) from oldest to newest.
+    window = collections.deque()
+    for i, x in enumerate(xs):
+        while window and dominates(x, xs[window[-1]]):
+            window.pop()
+        window.append(i)
+        if window[0] <= i - k:
+            window.popleft()
+        if i >= k - 1:
+            extremes.append(xs[window[0]])
+    return extremes
+
+
+def _numpy_sliding_extremes(xs, k, chunk_size, ufunc):
+    n = len(xs)
+    extremes = numpy.empty(max(n - k + 1, 0), dtype=xs.dtype)
+    # Each chunk of windows starting at [start, stop) covers the elements
+    # [start, stop + k - 1). Within it, the window starting at i ends at
+    # j = i + k - 1 in the next block after i's, or in i's own block if i
+    # starts one, so its extreme is that of the suffix of i's block from i
+    # and the prefix of j's block to j. Chunks share their last k - 1
+    # elements with the next chunk, so chunks of fewer than k windows would
+    # reread elements more than twice, costing O(n * k / chunk_size) time.
+    chunk_size = max(chunk_size, k)
+    for start in range(0, len(extremes), chunk_size):
+        stop = min(start + chunk_size, len(extremes))
+        chunk = xs[start : stop + k - 1]
+        blocks = -(-len(chunk) // k)
+        padded = numpy.empty(blocks * k, dtype=xs.dtype)
+        padded[: len(chunk)] = chunk
+        padded[len(chunk) :] = chunk[-1]  # Never part of a window.
+        padded = padded.reshape(blocks, k)
+        prefixes = ufunc.accumulate(padded, axis=1).ravel()
+        suffixes = ufunc.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+        m = stop - start
+        ufunc(suffixes[:m], prefixes[k - 1 : k - 1 + m], out=extremes[start:stop])
+    return extremes
@@ -0,0 +1,100 @@
+from array import array
+import functools
+import math
+import operator
+import random
+
+import pytest
+
+from sliding_windows import (
+    SlidingWindowAggregate,
+    sliding_aggregates,
+    sliding_max,
+    sliding_min,
+)
+
+
+def windows(xs, k):
+    return [xs[i : i + k] for i in range(len(xs) - k + 1)]
+
+
+def test_sliding_window_aggregate_matches_an_oracle_queue():
+    random.seed(8)
+    for op in (max, min, operator.add, math.gcd):
+        for typecode in (None, "q"):
+            queue = SlidingWindowAggregate(op, typecode)
+            oracle = []
+            for _ in range(2000):
+                if oracle and random.random() < 0.45:
+                    assert queue.pop() == oracle.pop(0)
+                else:
+                    x = random.randrange(1, 100)
+                    queue.push(x)
+                    oracle.append(x)
+                assert len(queue) == len(oracle)
+                if oracle:
+                    assert queue.aggregate() == functools.reduce(op, oracle)
+
+
+def test_sliding_window_aggregate_keeps_the_order_of_noncommutative_ops():
+    queue = SlidingWindowAggregate(operator.add)
+    for c in "abcd":
+        queue.push(c)
+    assert queue.pop() == "a"
+    queue.push("e")
+    assert queue.aggregate() == "bcde"
+
+
+def test_sliding_window_aggregate_raises_error_when_empty():
+    queue = SlidingWindowAggregate(max)
+    pytest.raises(IndexError, queue.pop)
+    pytest.raises(IndexError, queue.aggregate)
+
+
+def test_sliding_aggregates():
+    random.seed(9)
+    for n in range(12):
+        xs = [random.randrange(1, 20) for _ in range(n)]
+        for k in range(1, n + 2):
+            for op in (max, operator.add, math.gcd):
+                expected = [functools.reduce(op, w) for w in windows(xs, k)]
+                assert list(sliding_aggregates(xs, k, op)) == expected
+                assert list(sliding_aggregates(xs, k, op, "q")) == expected
+    with pytest.raises(ValueError):
+        list(sliding_aggregates([1], 0, max))
+
+
+def test_sliding_max_and_min():
+    random.seed(10)
+    for n in range(12):
+        xs = [random.randrange(5) for _ in range(n)]
+        for k in range(1, n + 2):
+            assert sliding_max(xs, k) == [max(w) for w in windows(xs, k)]
+            assert sliding_min(xs, k) == [min(w) for w in windows(xs, k)]
+            maxima = sliding_max(array("d", xs), k)
+            assert maxima == array("d", [max(w) for w in windows(xs, k)])
+    pytest.raises(ValueError, lambda: sliding_max([1], 0))
+
+
+def test_sliding_max_and_min_with_numpy():
+    numpy = pytest.importorskip("numpy")
+    rng = numpy.random.default_rng(11)
+    for n in [1, 2, 7, 64, 1000]:
+        xs = rng.integers(-100, 100, size=n)
+        for k in sorted({1, 2, 3, n // 2 or 1, n}):
+            for chunk_size in [1, 5, 2**20]:
+                maxima = sliding_max(xs, k, chunk_size)
+                minima = sliding_min(xs, k, chunk_size)
+                assert isinstance(maxima, numpy.ndarray)
+                assert maxima.tolist() == sliding_max(xs.tolist(), k)
+                assert minima.tolist() == sliding_min(xs.tolist(), k)
+    assert len(sliding_max(numpy.arange(3), 4)) == 0
+
+
+def test_numpy_sliding_max_with_windows_longer_than_chunks():
+    numpy = pytest.importorskip("numpy")
+    xs = numpy.random.default_rng(12).integers(-100, 100, size=5000)
+    for k in [11, 1000, 4999]:
+        expected = sliding_max(xs.tolist(), k)
+        assert sliding_max(xs, k, chunk_size=10).tolist() == expected
+        assert sliding_min(xs, k, chunk_size=10).tolist() == sliding_min(xs.tolist(), k)
@@ -8,26 +8,212 @@ Tom Moertel <tom@moertel.com>
 """
 
 import functools
+import hashlib
+import inspect
+import math
+import pickle
+import sqlite3
 import sys
+import threading
+from array import array
 from bisect import bisect_right
+from collections import OrderedDict, namedtuple
+from itertools import compress
+from math import gcd
+from operator import mul
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # Optional; matrix_pow_mod falls back to pure Python.
 
 # Decorators.
 
+CacheInfo = namedtuple("CacheInfo", "hits misses evictions maxsize currsize")
 
-def memoize(f):
-    """Make a memoized version of f that returns cached results."""
-    cache = {}
 
-    @functools.wraps(f)
-    def g(*args):
-        ret = cache.get(args, cache)
-        if ret is cache:
-            ret = cache[args] = f(*args)
-        return ret
+def memoize(f=None, maxsize=None, policy="lru"):
+    """Make a memoized version of f that returns cached results.
+
+    By default, the cache is unbounded.  Given a maxsize, the cache holds
+    at most that many results and, when full, evicts one according to
+    policy: "lru" evicts the least-recently used result, and "lfu" the
+    least-frequently used.  (LFU eviction scans the cache, costing
+    O(maxsize) per eviction.)  Use as `@memoize` or as
+    `@memoize(maxsize=10000, policy="lfu")`.
+
+    Cache hits take no lock, but misses do, so the memoized version is
+    safe to share among threads.  Hit counts may be approximate under
+    contention, and racing threads may call f for the same args.
 
+    The memoized version provides cache_info(), which reports hits,
+    misses, evictions, and sizes, and cache_clear(), which empties the
+    cache and resets its statistics.
+
+    """
+    if f is None:
+        return functools.partial(memoize, maxsize=maxsize, policy=policy)
+    if policy not in ("lru", "lfu"):
+        raise ValueError("unknown eviction policy %r" % (policy,))
+    if maxsize is not None and maxsize < 1:
+        raise ValueError("maxsize=%r must be at least 1" % (maxsize,))
+    cache = {} if maxsize is None else OrderedDict()
+    uses = {}  # Use counts for LFU eviction.
+    stats = [0, 0, 0]  # Hits, misses, evictions.
+    lock = threading.Lock()
+
+    if maxsize is None:
+
+        @functools.wraps(f)
+        def g(*args):
+            ret = cache.get(args, cache)
+            if ret is cache:
+                ret = f(*args)
+                with lock:
+                    stats[1] += 1
+                    cache[args] = ret
+            else:
+                stats[0] += 1
+            return ret
+
+    else:
+        lru = policy == "lru"
+
+        def evict():
+            if lru:
+                cache.popitem(last=False)
+            else:
+                k = min(cache, key=lambda k: uses.get(k, 0))
+                del cache[k]
+                uses.pop(k, None)
+            stats[2] += 1
+
+        @functools.wraps(f)
+        def g(*args):
+            ret = cache.get(args, cache)
+            if ret is cache:
+                ret = f(*args)
+                with lock:
+                    stats[1] += 1
+                    if args not in cache:
+                        while len(cache) >= maxsize:
+                            evict()
+                        cache[args] = ret
+                        if not lru:
+                            uses[args] = 1
+                            if len(uses) > 2 * maxsize:
+                                # Drop counts that racing hits re-created.
+                                for k in [k for k in uses if k not in cache]:
+                                    del uses[k]
+                return ret
+            stats[0] += 1
+            try:
+                if lru:
+                    cache.move_to_end(args)
+                else:
+                    uses[args] += 1
+            except KeyError:
+                pass  # Another thread evicted args after we found it.
+            return ret
+
+    def cache_info():
+        with lock:
+            return CacheInfo(stats[0], stats[1], stats[2], maxsize, len(cache))
+
+    def cache_clear():
+        with lock:
+            cache.clear()
+            uses.clear()
+            stats[:] = [0, 0, 0]
+
+    g.cache_info = cache_info
+    g.cache_clear = cache_clear
     return g
 
 
+def persistent_memoize(path, version=None):
+    """Make a decorator that memoizes f in the sqlite database at path.
+
+    Results survive the process, so a restarted program reuses the work
+    of earlier runs.  Entries are keyed by f's module and qualified name
+    plus a version string, which defaults to a hash of f's source code;
+    editing f thus invalidates its old results.  Pass your own version
+    when f's results depend on code outside f.  Arguments and results
+    must be picklable, and f must be pure.
+
+    Like memoize, the memoized version provides cache_info() and
+    cache_clear().  The latter deletes f's results for the current
+    version from the database.
+
+    """
+
+    def decorator(f):
+        name = "%s.%s" % (f.__module__, f.__qualname__)
+        ver = version
+        if ver is None:
+            try:
+                ver = hashlib.sha256(inspect.getsource(f).encode()).hexdigest()
+            except (OSError, TypeError):
+                ver = hashlib.sha256(f.__code__.co_code).hexdigest()
+        db = sqlite3.connect(path, check_same_thread=False)
+        with db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS memo (fn TEXT, version TEXT,"
+                " args BLOB, ret BLOB, PRIMARY KEY (fn, version, args))"
+            )
+        db.execute("PRAGMA synchronous=NORMAL")
+        cache = {}  # In-memory layer over the database.
+        stats = [0, 0]  # Hits, misses.
+        lock = threading.Lock()
+
+        @functools.wraps(f)
+        def g(*args):
+            ret = cache.get(args, cache)
+            if ret is not cache:
+                stats[0] += 1
+                return ret
+            key = pickle.dumps(args, pickle.HIGHEST_PROTOCOL)
+            with lock:
+                row = db.execute(
+                    "SELECT ret FROM memo WHERE fn = ? AND version = ? AND args = ?",
+                    (name, ver, key),
+                ).fetchone()
+            if row is not None:
+                stats[0] += 1
+                ret = cache[args] = pickle.loads(row[0])
+                return ret
+            ret = f(*args)
+            with lock, db:
+                stats[1] += 1
+                db.execute(
+                    "INSERT OR REPLACE INTO memo VALUES (?, ?, ?, ?)",
+                    (name, ver, key, pickle.dumps(ret, pickle.HIGHEST_PROTOCOL)),
+                )
+                cache[args] = ret
+            return ret
+
+        def cache_info():
+            with lock:
+                (size,) = db.execute(
+                    "SELECT COUNT(*) FROM memo WHERE fn = ? AND version = ?",
+                    (name, ver),
+                ).fetchone()
+                return CacheInfo(stats[0], stats[1], 0, None, size)
+
+        def cache_clear():
+            with lock, db:
+                db.execute("DELETE FROM memo WHERE fn = ? AND version = ?", (name, ver))
+                cache.clear()
+                stats[:] = [0, 0]
+
+        g.cache_info = cache_info
+        g.cache_clear = cache_clear
+        return g
+
+    return decorator
+
+
 def trace(f, printer=None):
     """Make a version of f that prints a trace of its calls."""
     fnm = f.__name__
@@ -147,15 +333,58 @@ def _check_bisection_bounds(f, lo, hi, y):
         raise ValueError("solution is above upper bound")
 
 
+def find_int_by_galloping(f, lo, y):
+    """Find maximal int x >= lo such that f(x) <= y.
+
+    Unlike find_int_by_bisection, this search needs no upper bound.  It
+    doubles its stride until it overshoots and then bisects, taking
+    O(log d) probes, where d is the distance from lo to the solution.
+
+    Note: f must be monotonic for x >= lo and must eventually exceed y.
+
+    """
+    if y < f(lo):
+        raise ValueError("solution is below lower bound")
+    stride = 1
+    while f(lo + stride) <= y:
+        lo += stride
+        stride <<= 1
+    hi = lo + stride  # Invariant: f(lo) <= y < f(hi).
+    while hi - lo > 1:
+        mid = lo + ((hi - lo) >> 1)
+        if f(mid) <= y:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
 def isqrt(y):
-    """Find maximal int x > 0 such that x * x <= y."""
+    """Find maximal int x >= 0 such that x * x <= y."""
     if y < 0:
         raise ValueError("isqrt is not defined for negative values")
+    return math.isqrt(y)
 
-    def f(x):
-        return x * x
 
-    return find_int_by_bisection(f, 0, y, y)
+def iroot(y, k):
+    """Find maximal int x >= 0 such that x ** k <= y, for int k >= 1."""
+    if y < 0:
+        raise ValueError("iroot is not defined for negative values")
+    if k < 1:
+        raise ValueError("k=%r must be at least 1" % (k,))
+    if k == 1 or y < 2:
+        return y
+    if k == 2:
+        return math.isqrt(y)
+    # Use Newton's method, starting from x = 2^ceil(bits(y) / k) > root.
+    # The iterates decrease monotonically until they reach the floor of
+    # the root.
+    x = 1 << -(-y.bit_length() // k)
+    while True:
+        z = ((k - 1) * x + y // x ** (k - 1)) // k
+        if z >= x:
+            return x
+        x = z
 
 
 def fast_pow(x, n):
@@ -201,14 +430,14 @@ def fast_gpow(x, n, mul, mul_identity):
 
 def dot_product(u, v):
     """Compute dot product of equal-length vectors u and v."""
-    return sum(u[i] * v[i] for i in range(len(u)))
+    return sum(map(mul, u, v))
 
 
 def mk_dot_product_mod(m):
     """Make a dot-product function that computes mod m."""
 
     def dot_product_mod(u, v):
-        return sum((u[i] * v[i]) % m for i in range(len(u))) % m
+        return sum(map(mul, u, v)) % m  # Python ints can't overflow.
 
     return dot_product_mod
 
@@ -239,9 +468,66 @@ matrix_mul = mk_matrix_mul()  # Common-case version.
 
 def matrix_mul_mod(A, B, m):
     """Compute product of matrices A and B (mod m)."""
+    if len(A) > STRASSEN_CUTOFF and len(A) == len(A[0]) == len(B) == len(B[0]):
+        return _strassen_mul_mod(A, B, m)
     return mk_matrix_mul(mk_dot_product_mod(m))(A, B)
 
 
+# Square matrices larger than this are multiplied by Strassen's algorithm.
+STRASSEN_CUTOFF = 64
+
+
+def _strassen_mul_mod(A, B, m, cutoff=None):
+    """Compute product of n*n matrices A and B (mod m) by Strassen's algorithm.
+
+    Reference: Strassen, V. Gaussian elimination is not optimal.
+    Numerische Mathematik 13:354-356, 1969.
+
+    """
+    if cutoff is None:
+        cutoff = STRASSEN_CUTOFF
+    n = len(A)
+    if n <= cutoff:
+        return mk_matrix_mul(mk_dot_product_mod(m))(A, B)
+    h = (n + 1) // 2
+
+    def quarter(X):
+        if n & 1:  # Pad to even size.
+            X = [row + [0] for row in X] + [[0] * (n + 1)]
+        top, bottom = X[:h], X[h:]
+        return (
+            [row[:h] for row in top],
+            [row[h:] for row in top],
+            [row[:h] for row in bottom],
+            [row[h:] for row in bottom],
+        )
+
+    def add(X, Y):
+        return [[(x + y) % m for x, y in zip(r, s)] for r, s in zip(X, Y)]
+
+    def sub(X, Y):
+        return [[(x - y) % m for x, y in zip(r, s)] for r, s in zip(X, Y)]
+
+    def times(X, Y):
+        return _strassen_mul_mod(X, Y, m, cutoff)
+
+    A11, A12, A21, A22 = quarter(A)
+    B11, B12, B21, B22 = quarter(B)
+    M1 = times(add(A11, A22), add(B11, B22))
+    M2 = times(add(A21, A22), B11)
+    M3 = times(A11, sub(B12, B22))
+    M4 = times(A22, sub(B21, B11))
+    M5 = times(add(A11, A12), B22)
+    M6 = times(sub(A21, A11), add(B11, B12))
+    M7 = times(sub(A12, A22), add(B21, B22))
+    C11 = add(sub(add(M1, M4), M5), M7)
+    C12 = add(M3, M5)
+    C21 = add(M2, M4)
+    C22 = add(sub(add(M1, M3), M2), M6)
+    C = [r + s for r, s in zip(C11, C12)] + [r + s for r, s in zip(C21, C22)]
+    return [row[:n] for row in C[:n]]
+
+
 def identity_matrix(n):
     """Make n*n identity matrix."""
     A = [[0] * n for _ in range(n)]
@@ -255,11 +541,103 @@ def matrix_pow(A, n, dot=dot_product):
     return fast_gpow(A, n, mk_matrix_mul(dot), identity_matrix(len(A)))
 
 
-def matrix_pow_mod(A, n, m):
-    """Raise matrix A to the integer power n (mod m)."""
-    return fast_gpow(
-        A, n, mk_matrix_mul(mk_dot_product_mod(m)), identity_matrix(len(A))
-    )
+def matrix_pow_mod(A, n, m, powers=None):
+    """Raise matrix A to the integer power n (mod m).
+
+    When NumPy is installed and the products fit into int64, NumPy does
+    the multiplications; otherwise, matrix_mul_mod does.  To raise the
+    same A to many powers, build its power table once with
+    matrix_power_table and pass it as powers.
+    """
+    d = len(A)
+    if _numpy_can_mul_mod(d, m):
+        lift = functools.partial(numpy.array, dtype=numpy.int64)
+        times = lambda X, Y: X @ Y % m
+        lower = numpy.ndarray.tolist
+    else:
+        lift = lower = lambda X: X
+        times = lambda X, Y: matrix_mul_mod(X, Y, m)
+    I = lift(identity_matrix(d))
+    if powers is None:
+        return lower(fast_gpow(lift(_matrix_mod(A, m)), n, times, I))
+    if n >> len(powers):
+        raise ValueError("power table is too short for n=%r" % (n,))
+    for P in powers:
+        if n & 1:
+            I = times(I, lift(P))
+        n >>= 1
+    return lower(I)
+
+
+def matrix_power_table(A, nbits, m):
+    """Make the table [A^(2^0), A^(2^1), ..., A^(2^(nbits-1))] (mod m).
+
+    The table lets matrix_pow_mod raise A to any power below 2^nbits with
+    only the multiplications for n's one bits.
+    """
+    powers = []
+    A = _matrix_mod(A, m)
+    for _ in range(nbits):
+        powers.append(A)
+        A = matrix_mul_mod(A, A, m)
+    return powers
+
+
+def _matrix_mod(A, m):
+    return [[x % m for x in row] for row in A]
+
+
+def _numpy_can_mul_mod(d, m):
+    """Test whether NumPy can multiply d*d matrices (mod m) in int64."""
+    return numpy is not None and d * (m - 1) ** 2 < 2**63
+
+
+# Linear recurrences.
+
+
+def linear_recurrence(coeffs, initial, n, m=None):
+    """Find X[n] of the recurrence X[i] = sum(c[j] * X[i-1-j] for j < k).
+
+    The coeffs give c[0], ..., c[k-1], and initial gives X[0], ...,
+    X[k-1].  When m is given, compute X[n] (mod m).
+
+    Uses Kitamasa's method: X[n] = sum(r[i] * X[i] for i < k), where
+    r(x) = x^n mod the recurrence's characteristic polynomial.  Finding
+    r takes O(k^2 log n) time, versus O(k^3 log n) for matrix powers.
+    """
+    k = len(coeffs)
+    if len(initial) != k:
+        raise ValueError("need exactly one initial value per coefficient")
+    reduce = (lambda x: x) if m is None else (lambda x: x % m)
+    if n < k:
+        return reduce(initial[n])
+
+    def times_x(r):
+        # Shift r up one degree and rewrite x^k as sum(c[j] * x^(k-1-j)).
+        top = r[-1]
+        r = [0] + r[:-1]
+        return [reduce(x + top * c) for x, c in zip(r, reversed(coeffs))]
+
+    def square(r):
+        prod = [0] * (2 * k - 1)
+        for i, ri in enumerate(r):
+            if ri:
+                for j, rj in enumerate(r):
+                    prod[i + j] += ri * rj
+        # Rewrite each x^i, i >= k, as sum(c[j] * x^(i-1-j)), from the top down.
+        for i in range(2 * k - 2, k - 1, -1):
+            top = prod[i]
+            if top:
+                for j, c in enumerate(coeffs):
+                    prod[i - 1 - j] += top * c
+        return [reduce(x) for x in prod[:k]]
+
+    r = [1] + [0] * (k - 1)  # x^0
+    for bit in bin(n)[2:]:
+        r = square(r)
+        if bit == "1":
+            r = times_x(r)
+    return reduce(sum(map(mul, r, initial)))
 
 
 # Combinatorics.
@@ -305,81 +683,314 @@ def primes_upto(n):
 
     Prefer primes_upto_at_least if you can tolerate extra primes > n.
     """
-    global PRIMES, PRIME_TABLE_CUTOFF
     if n > PRIME_TABLE_CUTOFF:
-        while PRIME_TABLE_CUTOFF < n:
-            PRIME_TABLE_CUTOFF *= 2
-        PRIMES = _prime_sieve(PRIME_TABLE_CUTOFF)
+        _extend_prime_table(n)
     return PRIMES[: bisect_right(PRIMES, n)]
 
 
 def primes_upto_at_least(n):
-    """Get an increasing list of all primes <= m for some m >= n."""
-    return PRIMES if n <= PRIME_TABLE_CUTOFF else primes_upto(n)
+    """Get an increasing list of all primes <= m for some m >= n.
+
+    The list is the shared prime table, so don't modify it.
+    """
+    if n > PRIME_TABLE_CUTOFF:
+        _extend_prime_table(n)
+    return PRIMES
+
+
+def _extend_prime_table(n):
+    """Extend the prime table to cover n, sieving only the new segment."""
+    global PRIME_TABLE_CUTOFF
+    lo = PRIME_TABLE_CUTOFF
+    hi = max(lo, MIN_PRIME_TABLE_CUTOFF)
+    while hi < n:
+        hi *= 2
+    r = isqrt(hi)
+    base_primes = PRIMES if r <= lo else _prime_sieve(r)
+    PRIMES.extend(_segmented_prime_sieve(lo, hi, base_primes))
+    PRIME_TABLE_CUTOFF = hi
 
 
 def _prime_sieve(n):
     """Get an increasing list of all primes <= n."""
-    candidates = [True] * (n + 1)
-    primes = []
-    for i in range(2, n + 1):
-        if candidates[i]:
-            primes.append(i)
-            for j in range(i + i, n + 1, i):
-                candidates[j] = False
+    if n < 2:
+        return []
+    # Sieve only odd numbers: sieve[i] represents 2 * i + 1.
+    sieve = bytearray([1]) * ((n + 1) // 2)
+    sieve[0] = 0  # 1 is not prime.
+    for i in range(1, (isqrt(n) + 1) // 2):
+        if sieve[i]:
+            p = 2 * i + 1
+            j = p * p // 2
+            sieve[j::p] = bytes(len(range(j, len(sieve), p)))
+    return [2] + list(compress(range(1, n + 1, 2), sieve))
+
+
+def _segmented_prime_sieve(lo, hi, base_primes, segment_size=2**18):
+    """Get an increasing list of all primes p such that lo < p <= hi.
+
+    The base_primes must include all primes <= isqrt(hi).  The sieve
+    works through the range in segments of segment_size odd numbers,
+    so its working memory is bounded regardless of the range's size.
+    """
+    primes = [2] if lo < 2 <= hi else []
+    start = max(lo + 1, 3) | 1  # Sieve only odd numbers.
+    while start <= hi:
+        stop = min(start + 2 * segment_size, hi + 1)
+        # Sieve odd numbers in [start, stop): sieve[i] represents start + 2 * i.
+        sieve = bytearray([1]) * ((stop - start + 1) // 2)
+        for p in base_primes:
+            if p * p >= stop:
+                break
+            if p == 2:
+                continue
+            m = max(p * p, (start + p - 1) // p * p)  # First multiple in range.
+            if not m & 1:
+                m += p  # Skip to next odd multiple.
+            i = (m - start) // 2
+            sieve[i::p] = bytes(len(range(i, len(sieve), p)))
+        primes.extend(compress(range(start, stop, 2), sieve))
+        start = stop
     return primes
 
 
-PRIME_TABLE_CUTOFF = 2**16
-PRIMES = _prime_sieve(PRIME_TABLE_CUTOFF)
+# The prime table holds all primes <= PRIME_TABLE_CUTOFF.  It's built on
+# first use and extended in place, doubling the cutoff as needed.
+MIN_PRIME_TABLE_CUTOFF = 2**16
+PRIME_TABLE_CUTOFF = 0
+PRIMES = []
 
 
 def prime_factors(n):
-    """Get an ordered list of the prime factors of n."""
-    if n < 1:
-        raise ValueError("n=%r cannot have prime factors" % (n,))
-    if n == 1:
-        return [1]
-    primes = primes_upto_at_least(isqrt(n) + 1)
-    factors = []
-    for p in primes:
-        if p * p > n:
-            break
-        while True:
-            q, r = divmod(n, p)
-            if r:
+    """Get an ordered list of the prime factors of n.
+
+    Small prime factors are found by trial division; whatever remains is
+    split by Pollard's rho (with Brent's cycle detection) until each
+    part passes the Miller-Rabin test in is_prime.
+    """
+    return prime_factors_many([n])[0]
+
+
+def prime_factors_many(ns):
+    """Get a list of the ordered prime-factor lists of each n in ns.
+
+    All of the numbers share one pass over the small primes: a single gcd
+    against their product reveals which small primes can divide each n,
+    and trial division is limited to those.
+    """
+    small_primes = primes_upto(SMALL_PRIME_CUTOFF)
+    small_primorial = _small_primorial()
+    results = []
+    for n in ns:
+        if n < 1:
+            raise ValueError("n=%r cannot have prime factors" % (n,))
+        if n == 1:
+            results.append([1])
+            continue
+        factors = []
+        g = gcd(n, small_primorial)
+        for p in small_primes:
+            if g == 1:
                 break
-            factors.append(p)
-            n = q
-    if n > 1:
-        factors.append(n)
-    return factors
+            if g % p == 0:
+                g //= p
+                while n % p == 0:
+                    factors.append(p)
+                    n //= p
+        if n > 1:
+            _factor_large(n, factors)
+            factors.sort()
+        results.append(factors)
+    return results
+
+
+def _factor_large(n, factors):
+    """Append to factors the prime factors of n, which has no small factors."""
+    stack = [n]
+    while stack:
+        n = stack.pop()
+        if n < SMALL_PRIME_CUTOFF**2 or is_prime(n):
+            factors.append(n)
+            continue
+        r = isqrt(n)
+        if r * r == n:
+            # Squares of large primes are out of rho's reach; split them here.
+            stack.extend((r, r))
+        else:
+            d = _pollard_brent(n)
+            stack.extend((d, n // d))
+
+
+def _pollard_brent(n):
+    """Find a nontrivial factor of odd composite n.
+
+    Reference: Brent, R. P. An improved Monte Carlo factorization
+    algorithm. BIT 20:176-184, 1980.
+
+    """
+    m = 128  # Steps between gcds.
+    for c in range(1, n):
+        y, r, q, g = 2, 1, 1, 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            # We overshot within the last batch; retrace it one step at a time.
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = gcd(abs(x - ys), n)
+        if g != n:
+            return g
+    raise ValueError("n=%r is not an odd composite" % (n,))
+
+
+# The first thirteen primes suffice as bases for a deterministic Miller-Rabin
+# test of all n < 3.3e24 (Sorenson and Webster, 2015).  The first twelve
+# suffice only for n < 3.18e23: 318665857834031151167461 is a strong
+# pseudoprime to all of them.
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def is_prime(n):
+    """Test whether integer n is prime by the Miller-Rabin test.
+
+    The test is exact for n < 3.3e24.  Above that, a composite n that
+    is a strong pseudoprime to all of MILLER_RABIN_BASES would be
+    reported prime, though no such n is known.
+    """
+    if n < 2:
+        return False
+    for p in MILLER_RABIN_BASES:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while not d & 1:
+        d >>= 1
+        s += 1
+    for a in MILLER_RABIN_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+SMALL_PRIME_CUTOFF = 2**10
+
+
+@memoize
+def _small_primorial():
+    """Get the product of all primes <= SMALL_PRIME_CUTOFF."""
+    return functools.reduce(mul, primes_upto(SMALL_PRIME_CUTOFF), 1)
 
 
 # Disjoint sets, supporting union and find operations.
 
 
-def mk_union_find_domain(elems):
-    """Make union and find methods over disjoint singleton sets from elems."""
-    d = dict((e, e) for e in elems)
-    r = dict((e, 1) for e in d)  # ranks
-
-    def union(u, v):
-        urep = find(u)
-        vrep = find(v)
-        if urep != vrep:
-            rank_diff = r[urep] - r[vrep]
-            if rank_diff < 0:
-                d[urep] = vrep
-            else:
-                d[vrep] = urep
-                if rank_diff == 0:
-                    r[urep] += 1
+class UnionFind:
+    """Disjoint sets, initially singletons, over a fixed domain of elements.
 
-    def find(u):
-        urep = d[u]
-        if urep != u:
-            urep = d[u] = find(urep)
-        return urep
+    Each element is mapped once to a dense int id; parents and ranks are
+    kept in arrays indexed by id.  If the domain is range(n), elements
+    are their own ids and no mapping is stored.  Find runs iteratively
+    with path halving, so deep chains can't exhaust the stack.
+    """
 
-    return union, find
+    def __init__(self, elems):
+        if isinstance(elems, range) and elems.start == 0 and elems.step == 1:
+            self.elems, self.ids = elems, None
+        else:
+            self.ids = {}
+            for e in elems:
+                self.ids.setdefault(e, len(self.ids))
+            self.elems = list(self.ids)
+        self.parent = array("i", range(len(self.elems)))
+        self.rank = array("B", bytes(len(self.elems)))  # Ranks <= log2(n).
+
+    def __len__(self):
+        return len(self.elems)
+
+    def find(self, u):
+        """Get the representative element of the set containing u."""
+        return self.elems[self.find_id(self._id(u))]
+
+    def union(self, u, v):
+        """Merge the sets containing u and v."""
+        self.union_ids(self._id(u), self._id(v))
+
+    def union_many(self, pairs):
+        """Merge the sets containing u and v for each pair (u, v) in pairs."""
+        ids = self.ids
+        union_ids = self.union_ids
+        if ids is None:
+            _id = self._id  # Range ids need bounds checks, like union's.
+            for u, v in pairs:
+                union_ids(_id(u), _id(v))
+        else:
+            for u, v in pairs:
+                union_ids(ids[u], ids[v])
+
+    def find_id(self, i):
+        """Get the id of the representative of the set containing id i."""
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = i = parent[parent[i]]  # Path halving.
+        return i
+
+    def union_ids(self, i, j):
+        """Merge the sets containing ids i and j."""
+        i = self.find_id(i)
+        j = self.find_id(j)
+        if i != j:
+            rank = self.rank
+            if rank[i] < rank[j]:
+                i, j = j, i
+            self.parent[j] = i
+            if rank[i] == rank[j]:
+                rank[i] += 1
+
+    def components(self):
+        """Get a list of the sets, each a list of elements."""
+        members = {}
+        find_id = self.find_id
+        for i, e in enumerate(self.elems):
+            members.setdefault(find_id(i), []).append(e)
+        return list(members.values())
+
+    def component_sizes(self):
+        """Get a dict mapping each set's representative element to its size."""
+        sizes = {}
+        find_id = self.find_id
+        for i in range(len(self.elems)):
+            rep = find_id(i)
+            sizes[rep] = sizes.get(rep, 0) + 1
+        return dict((self.elems[i], n) for i, n in sizes.items())
+
+    def _id(self, u):
+        if self.ids is None:
+            if not 0 <= u < len(self.elems):
+                raise KeyError(u)
+            return u
+        return self.ids[u]
+
+
+def mk_union_find_domain(elems):
+    """Make union and find methods over disjoint singleton sets from elems."""
+    uf = UnionFind(elems)
+    return uf.union, uf.find
@@ -0,0 +1,123 @@
+#!/usr/bin/python
+
+"""Benchmarks for `tomlib`, my library of helper functions.
+
+Usage:    python tomlib_benchmarks.py
+
+"""
+
+import os
+import tempfile
+import timeit
+
+import tomlib
+
+
+def timed(f, *args):
+    """Call f(*args) once and return the elapsed time in seconds."""
+    return timeit.timeit(lambda: f(*args), number=1)
+
+
+# Persistent memoization.
+
+
+def egg_drop_trials(floors, eggs):
+    """Count worst-case egg drops needed to search floors (see two_eggs)."""
+
+    @tomlib.memoize
+    def n(floors, eggs):
+        if eggs == 1 or floors < 2:
+            return floors
+        return 1 + min(
+            max(n(i - 1, eggs - 1), n(floors - i, eggs)) for i in range(1, floors)
+        )
+
+    for f in range(floors):  # Fill the table bottom up to limit recursion depth.
+        n(f, eggs)
+    return n(floors, eggs)
+
+
+def prime_count(n):
+    """Count the primes <= n."""
+    return len(tomlib._prime_sieve(n))
+
+
+def bench_persistent_memoize():
+    """Compare cold- and warm-start times of persistently memoized solvers."""
+    print("persistent_memoize: cold vs. warm start")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "memo.db")
+        for f, args in [(egg_drop_trials, (600, 3)), (prime_count, (10**6,))]:
+            # Each decoration starts with an empty in-memory layer, as a
+            # freshly started process would.
+            cold = timed(tomlib.persistent_memoize(path)(f), *args)
+            warm = timed(tomlib.persistent_memoize(path)(f), *args)
+            print(
+                "  %s(%s): cold %.4fs, warm %.4fs (%.0fx)"
+                % (f.__name__, ", ".join(map(repr, args)), cold, warm, cold / warm)
+            )
+
+
+# Numeric helpers.
+
+
+def bisection_isqrt(y):
+    """Find isqrt(y) by bisection, as tomlib once did."""
+    return tomlib.find_int_by_bisection(lambda x: x * x, 0, y, y)
+
+
+def bench_numeric(number=200):
+    """Compare integer roots and searches over operands from 10^6 to 10^300."""
+    print("integer roots and searches: microseconds per call")
+    columns = ["bisect sqrt", "isqrt", "iroot(y, 3)", "bisect cbrt", "gallop cbrt"]
+    print("  %6s" % "y" + " %12s" * len(columns) % tuple(columns))
+
+    def cube(x):
+        return x * x * x
+
+    for e in [6, 12, 25, 50, 100, 200, 300]:
+        y = 10**e + 12345
+        cases = [
+            (bisection_isqrt, y),
+            (tomlib.isqrt, y),
+            (tomlib.iroot, y, 3),
+            (tomlib.find_int_by_bisection, cube, 0, y, y),
+            (tomlib.find_int_by_galloping, cube, 0, y),
+        ]
+        usecs = [
+            1e6 * timeit.timeit(lambda: f(*args), number=number) / number
+            for f, *args in cases
+        ]
+        print("  10^%-3d %12.2f %12.2f %12.2f %12.2f %12.2f" % (e, *usecs))
+
+
+# Matrices and linear recurrences.
+
+
+def companion_matrix(coeffs):
+    """Make the matrix that advances the recurrence with the given coeffs."""
+    k = len(coeffs)
+    return [list(coeffs)] + [[int(i == j) for j in range(k)] for i in range(k - 1)]
+
+
+def bench_linear_recurrence(n=10**18, m=10**9 + 7):
+    """Compare matrix powers and Kitamasa's method for recurrences of order k."""
+    print("X[10^18] (mod 10^9 + 7) of an order-k recurrence: seconds")
+    print("  %4s %14s %14s" % ("k", "matrix_pow_mod", "Kitamasa"))
+    for k in [2, 8, 32, 64]:
+        coeffs = list(range(1, k + 1))
+        initial = [1] * k
+        A = companion_matrix(coeffs)
+        by_matrix = timed(tomlib.matrix_pow_mod, A, n - k + 1, m)
+        by_kitamasa = timed(tomlib.linear_recurrence, coeffs, initial, n, m)
+        print("  %4d %14.4f %14.4f" % (k, by_matrix, by_kitamasa))
+
+
+def main():
+    bench_persistent_memoize()
+    bench_numeric()
+    bench_linear_recurrence()
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,90 @@ def test_memoize():
         assert f(i) == f(i)  # Memoized f must return cached values.
 
 
+def test_memoize_cache_info_and_clear():
+    f = memoize(lambda x: x * x)
+    for x in [1, 2, 1, 1]:
+        assert f(x) == x * x
+    assert f.cache_info() == CacheInfo(2, 2, 0, None, 2)
+    f.cache_clear()
+    assert f.cache_info() == CacheInfo(0, 0, 0, None, 0)
+
+
+def test_memoize_lru_eviction():
+    calls = []
+
+    @memoize(maxsize=2)
+    def f(x):
+        calls.append(x)
+        return -x
+
+    for x in [1, 2, 1, 3, 1, 2]:
+        assert f(x) == -x
+    # Calling f(3) evicts 2, the least recently used; calling f(2) evicts 3.
+    assert calls == [1, 2, 3, 2]
+    assert f.cache_info() == CacheInfo(2, 4, 2, 2, 2)
+
+
+def test_memoize_lfu_eviction():
+    calls = []
+
+    @memoize(maxsize=2, policy="lfu")
+    def f(x):
+        calls.append(x)
+        return -x
+
+    for x in [1, 1, 1, 2, 3, 2, 1]:
+        assert f(x) == -x
+    # Calling f(3) evicts 2, the least frequently used; calling f(2) evicts 3.
+    assert calls == [1, 2, 3, 2]
+    assert f.cache_info() == CacheInfo(3, 4, 2, 2, 2)
+
+
+def test_memoize_is_thread_safe():
+    from concurrent.futures import ThreadPoolExecutor
+
+    @memoize(maxsize=50)
+    def f(x):
+        return x * x
+
+    with ThreadPoolExecutor(8) as pool:
+        xs = [i % 100 for i in range(10000)]
+        assert list(pool.map(f, xs)) == [x * x for x in xs]
+    assert f.cache_info().currsize <= 50
+
+
+def test_memoize_exc():
+    with pytest.raises(ValueError):
+        memoize(abs, maxsize=0)
+    with pytest.raises(ValueError):
+        memoize(abs, policy="fifo")
+
+
+def test_persistent_memoize(tmp_path):
+    path = str(tmp_path / "memo.db")
+    calls = []
+
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    f = persistent_memoize(path, version="1")(square)
+    assert [f(x) for x in [1, 2, 1]] == [1, 4, 1]
+    assert f.cache_info() == CacheInfo(1, 2, 0, None, 2)
+    # A fresh memoized version, as after a restart, must reuse stored results.
+    f = persistent_memoize(path, version="1")(square)
+    assert [f(x) for x in [1, 2]] == [1, 4]
+    assert calls == [1, 2]
+    # A new version must not.
+    g = persistent_memoize(path, version="2")(square)
+    assert g(1) == 1
+    assert calls == [1, 2, 1]
+    # Clearing a version must leave other versions alone.
+    g.cache_clear()
+    assert g.cache_info() == CacheInfo(0, 0, 0, None, 0)
+    assert f.cache_info().currsize == 2
+
+
 def test_trace():
     output = []
 
@@ -64,11 +148,33 @@ def test_isqrt():
             x = isqrt(y)
             assert x * x <= y  # Must not exceed y.
             assert (x + 1) * (x + 1) > y  # Must be maximal.
+    # Large cases.
+    for e in range(6, 301, 7):
+        for y in [10**e - 1, 10**e, 10**e + 1]:
+            x = isqrt(y)
+            assert x * x <= y < (x + 1) * (x + 1)
     # Exceptional cases.
     with pytest.raises(ValueError):
         isqrt(-1)
 
 
+def test_iroot():
+    """iroot(y, k) must return maximal x such that 0 <= x**k <= y."""
+    big = [10**e + d for e in range(6, 301, 41) for d in (-1, 0, 1)]
+    for k in range(1, 8):
+        for y in list(range(300)) + big:
+            x = iroot(y, k)
+            assert x**k <= y < (x + 1) ** k
+        for x in [2, 3, 10**20 + 7]:
+            assert iroot(x**k, k) == x
+            assert iroot(x**k - 1, k) == x - 1
+    # Exceptional cases.
+    with pytest.raises(ValueError):
+        iroot(-1, 3)
+    with pytest.raises(ValueError):
+        iroot(8, 0)
+
+
 def test_find_minimum_by_newtons_method():
     def make_objective_for_parabola(X, Y, a, b):
         X = float(X)
@@ -147,6 +253,17 @@ def test_find_int_by_bisection_exc():
     pytest.raises(ValueError, find_int_by_bisection, identity, 1, 2, 3)  # f(hi) < y
 
 
+def test_find_int_by_galloping():
+    def f(x):
+        return x * x
+
+    for lo in range(5):
+        for y in range(lo * lo, 500):
+            assert find_int_by_galloping(f, lo, y) == isqrt(y)
+    assert find_int_by_galloping(f, 0, 10**300) == isqrt(10**300)
+    pytest.raises(ValueError, find_int_by_galloping, f, 2, 3)  # f(lo) > y
+
+
 def test_fast_pow():
     for x in range(10):
         for n in range(10):
@@ -178,9 +295,73 @@ def test_matrix_pow_mod():
     assert matrix_pow_mod(A, 0, 371) == identity_matrix(2)
 
 
+def test_matrix_pow_mod_with_power_table():
+    A = [[6, -4], [1, 0]]
+    powers = matrix_power_table(A, 10, 371)
+    assert matrix_pow_mod(A, 1001, 371, powers) == [[131, 286], [114, 189]]
+    for n in range(40):
+        assert matrix_pow_mod(A, n, 371, powers) == matrix_pow_mod(A, n, 371)
+    with pytest.raises(ValueError):
+        matrix_pow_mod(A, 1024, 371, powers)
+
+
+def test_matrix_pow_mod_with_huge_modulus():
+    # Products overflow int64, so this case must stay in pure Python.
+    A = [[6, -4], [1, 0]]
+    m = 2**100 + 277
+    assert matrix_pow_mod(A, 1001, m) == [
+        [x % m for x in row] for row in matrix_pow(A, 1001)
+    ]
+
+
+def test_matrix_pow_mod_with_numpy():
+    pytest.importorskip("numpy")
+    A = [[6, -4], [1, 0]]
+    assert tomlib._numpy_can_mul_mod(2, 371)
+    assert matrix_pow_mod(A, 1001, 371) == [[131, 286], [114, 189]]
+    assert isinstance(matrix_pow_mod(A, 1001, 371)[0][0], int)
+
+
+def test_strassen_mul_mod():
+    from random import randrange
+
+    m = 1000003
+    for n in [1, 2, 5, 8, 13]:
+        A = [[randrange(-m, m) for _ in range(n)] for _ in range(n)]
+        B = [[randrange(-m, m) for _ in range(n)] for _ in range(n)]
+        expected = matrix_mul_mod(A, B, m)
+        assert tomlib._strassen_mul_mod(A, B, m, cutoff=1) == expected
+
+
+def test_linear_recurrence():
+    def naive(coeffs, initial, n):
+        xs = list(initial)
+        while len(xs) <= n:
+            xs.append(sum(c * x for c, x in zip(coeffs, reversed(xs))))
+        return xs[n]
+
+    for coeffs, initial in [
+        ([1, 1], [0, 1]),  # Fibonacci numbers.
+        ([6, -4], [2, 6]),  # X[n] from GCJ 2008 round 1A problem C.
+        ([3], [5]),
+        ([2, 0, -1, 5], [1, -2, 3, 7]),
+    ]:
+        for n in range(60):
+            x = naive(coeffs, initial, n)
+            assert linear_recurrence(coeffs, initial, n) == x
+            assert linear_recurrence(coeffs, initial, n, 371) == x % 371
+    # Agree with matrix powers for large n.
+    A1K1 = matrix_pow_mod([[6, -4], [1, 0]], 1000, 1000)
+    assert linear_recurrence([6, -4], [2, 6], 1001, 1000) == (
+        (A1K1[0][0] * 6 + A1K1[0][1] * 2) % 1000
+    )
+    with pytest.raises(ValueError):
+        linear_recurrence([1, 1], [1], 5)
+
+
 def test_prime_factors():
     assert prime_factors(1) == [1]
-    for m in PRIMES[:5]:
+    for m in primes_upto(11):
         for n in range(1, 10):
             factors = prime_factors(m**n)
             assert all(f == m for f in factors)
@@ -196,9 +377,66 @@ def test_prime_factors():
         prime_factors(0)
 
 
+def test_prime_factors_of_large_numbers():
+    from operator import mul
+
+    p, q, r = 999999937, 1000000007, 2**61 - 1  # All primes.
+    for factors in [[p, q], [p, p, q], [3, 7, p, r], [r, r], [q]]:
+        n = functools.reduce(mul, factors)
+        assert prime_factors(n) == sorted(factors)
+
+
+def test_prime_factors_many():
+    ns = list(range(1, 1000)) + [999999937 * 1000000007]
+    assert prime_factors_many(ns) == [prime_factors(n) for n in ns]
+    with pytest.raises(ValueError):
+        prime_factors_many([2, 0])
+
+
+def test_is_prime():
+    primes = set(tomlib._prime_sieve(10000))
+    for n in range(-10, 10000):
+        assert is_prime(n) == (n in primes)
+    # Carmichael numbers and strong pseudoprimes to small bases.
+    for n in [561, 41041, 3215031751, 3825123056546413051]:
+        assert not is_prime(n)
+    # A strong pseudoprime to all prime bases up to 37.
+    assert not is_prime(318665857834031151167461)
+    assert prime_factors(318665857834031151167461) == [399165290221, 798330580441]
+    assert is_prime(2**61 - 1)
+    assert is_prime(2**89 - 1)
+
+
+def test_prime_sieve():
+    def is_prime(n):
+        return n > 1 and all(n % d for d in range(2, n))
+
+    for n in range(200):
+        assert tomlib._prime_sieve(n) == [p for p in range(n + 1) if is_prime(p)]
+
+
+def test_segmented_prime_sieve():
+    primes = tomlib._prime_sieve(10000)
+    for lo, hi in [(0, 10000), (1, 2), (2, 3), (97, 1009), (5000, 10000)]:
+        for segment_size in [1, 7, 64, 2**18]:
+            ps = tomlib._segmented_prime_sieve(lo, hi, primes, segment_size)
+            assert ps == [p for p in primes if lo < p <= hi]
+
+
+def test_prime_table_is_built_lazily():
+    import os
+    import subprocess
+    import sys
+
+    code = "import tomlib; assert tomlib.PRIMES == [], tomlib.PRIMES[:5]"
+    cwd = os.path.dirname(os.path.abspath(tomlib.__file__))
+    subprocess.run([sys.executable, "-c", code], cwd=cwd, check=True)
+
+
 def test_primes_upto():
-    primes = tomlib._prime_sieve(PRIME_TABLE_CUTOFF + 1000)
-    l = len(PRIMES)
+    primes_upto(2)  # Make sure the prime table has been built.
+    primes = tomlib._prime_sieve(tomlib.PRIME_TABLE_CUTOFF + 1000)
+    l = len(tomlib.PRIMES)
     for i, p in list(enumerate(primes, 1))[l - 10 : l + 10]:
         ps = primes_upto(p)
         assert p in ps
@@ -207,8 +445,9 @@ def test_primes_upto():
 
 
 def test_primes_upto_at_least():
-    primes = tomlib._prime_sieve(PRIME_TABLE_CUTOFF + 1000)
-    l = len(PRIMES)
+    primes_upto(2)  # Make sure the prime table has been built.
+    primes = tomlib._prime_sieve(tomlib.PRIME_TABLE_CUTOFF + 1000)
+    l = len(tomlib.PRIMES)
     for i, p in list(enumerate(primes, 1))[l - 10 : l + 10]:
         ps = primes_upto_at_least(p)
         assert p in ps
@@ -248,6 +487,42 @@ def test_mk_union_find_domain():
         assert len(functools.reduce(set.union, rep_elem_sets)) == len(subsets)
 
 
+def test_union_find():
+    for xs in [range(10), [chr(ord("a") + i) for i in range(10)]]:
+        uf = UnionFind(xs)
+        assert len(uf) == 10
+        uf.union_many([(xs[0], xs[1]), (xs[2], xs[3]), (xs[1], xs[3])])
+        uf.union(xs[7], xs[8])
+        assert uf.find(xs[0]) == uf.find(xs[2])
+        assert uf.find(xs[7]) == uf.find(xs[8]) != uf.find(xs[0])
+        groups = sorted(sorted(c) for c in uf.components())
+        assert groups == sorted(
+            [[xs[0], xs[1], xs[2], xs[3]], [xs[4]], [xs[5]], [xs[6]]]
+            + [[xs[7], xs[8]], [xs[9]]]
+        )
+        sizes = uf.component_sizes()
+        assert sorted(sizes.values()) == [1, 1, 1, 1, 2, 4]
+        assert sizes[uf.find(xs[1])] == 4
+        with pytest.raises(KeyError):
+            uf.find(10)
+        for pair in [(-1, xs[0]), (xs[0], 10)]:
+            with pytest.raises(KeyError):
+                uf.union(*pair)
+            with pytest.raises(KeyError):
+                uf.union_many([pair])
+        assert sorted(uf.component_sizes().values()) == [1, 1, 1, 1, 2, 4]
+
+
+def test_union_find_handles_deep_chains():
+    n = 10**5
+    uf = UnionFind(range(n))
+    for i in range(1, n):
+        # Link each root under a new singleton to build a long chain.
+        uf.parent[i - 1] = i
+    assert uf.find(0) == n - 1
+    assert uf.component_sizes() == {n - 1: n}
+
+
 def test_binomial():
     from operator import __eq__
     from math import factorial as fact
@@ -7,8 +7,21 @@ position `i` within that string to start parsing at, and it yields one
 pair `(v, i')` for each possible parsing, where `v` is the resulting
 value and `i'` is the first character in `s` left unconsumed.
 
+Parsing is backtracking, so on ambiguous grammars sub-parsers may be
+run at the same position again and again.  To avoid this repeated
+work, wrap sub-parsers in `Rule` and call `parse` with `packrat=True`:
+rules then memoize their results per position, and left-recursive
+rules become legal.  (`Rule` also lets you define recursive grammars.)
+
+To parse input that doesn't fit in memory, such as a large file, wrap
+it in a `StreamInput`, or call `parse_many` to parse it as a sequence.
+
 """
 
+import codecs
+import collections
+import re
+
 
 class Parser(object):
     """Base class for all parsers."""
@@ -67,7 +80,7 @@ class Char(Parser):
         self.c = c
 
     def __call__(self, s, i):
-        if i < len(s) and s[i] == self.c:
+        if s[i : i + 1] == self.c:
             yield self.c, i + 1
 
 
@@ -79,12 +92,13 @@ class Many(Parser):
 
     def __call__(self, s, i):
         values = []
+        p = self.p
         while True:
-            for v, i in self.p(s, i):
-                values.append(v)
-                break
-            else:
+            result = next(p(s, i), None)
+            if result is None:
                 break
+            v, i = result
+            values.append(v)
         yield values, i
 
 
@@ -95,3 +109,475 @@ class Many1(Many):
         for v, i in Many.__call__(self, s, i):
             if v:
                 yield v, i
+
+
+class Rule(Parser):
+    """Matches what its definition `p` does.
+
+    Use rules to name sub-parsers and to tie recursive grammars together:
+
+        expr = Rule()
+        expr.define(expr + Char("+") + Char("1") | Char("1"))
+
+    When you call `parse` with `packrat=True`, rules memoize their results
+    per position, and left-recursive rules (like `expr` above) grow their
+    results from a failing seed until they stop consuming more input.
+    Without packrat parsing, left-recursive rules recurse forever.
+
+    References: Warth, A., Douglass, J. R., and Millstein, T. Packrat
+    parsers can support left recursion. PEPM 2008.  Medeiros, S.,
+    Mascarenhas, F., and Ierusalimschy, R. Left recursion in Parsing
+    Expression Grammars. Science of Computer Programming 96:177-190, 2014.
+
+    """
+
+    def __init__(self, p=None):
+        self.p = p
+
+    def define(self, p):
+        self.p = p
+        return self
+
+    def __call__(self, s, i):
+        if not isinstance(s, _PackratInput):
+            return self.p(s, i)
+        return iter(self._packrat_call(s, i))
+
+    def _packrat_call(self, s, i):
+        key = (self, i)
+        application = s.active.get(key)
+        if application is not None:
+            # We're already applying this rule at this position.  The call is
+            # left recursive, so answer with the current seed.  Applications
+            # that led here depend on the seed and must not be memoized.
+            if not application.growing:
+                application.left_recursive = True
+                for involved in s.stack[s.stack.index(application) + 1 :]:
+                    involved.memoizable = False
+            return application.seed
+        results = s.memo.get(key)
+        if results is not None:
+            s.memo.move_to_end(key)
+            return results
+
+        application = s.active[key] = _RuleApplication()
+        s.stack.append(application)
+        try:
+            results = tuple(self.p(s, i))
+            if application.left_recursive and results:
+                # Grow the seed until it stops consuming more input.
+                application.growing = True
+                s.growing += 1
+                try:
+                    while True:
+                        application.seed = results
+                        grown = tuple(self.p(s, i))
+                        if _furthest(grown) <= _furthest(results):
+                            break
+                        results = grown
+                finally:
+                    s.growing -= 1
+        finally:
+            s.stack.pop()
+            del s.active[key]
+        if application.memoizable and not s.growing:
+            s.memo[key] = results
+            if len(s.memo) > s.max_memo_entries:
+                s.memo.popitem(last=False)
+        return results
+
+
+def parse(p, s, i=0, packrat=False, max_memo_entries=2**20):
+    """Yields each parsing `(v, i')` of `s` by `p`, starting at position `i`.
+
+    With `packrat=True`, the `Rule` parsers within `p` memoize their results
+    in a table that lasts for this parse only and holds at most
+    `max_memo_entries` entries, evicting the least recently used.  Packrat
+    parsing needs string input; `s` can't be a `StreamInput`.
+
+    """
+    if packrat:
+        if not isinstance(s, str):
+            raise TypeError("packrat parsing needs str input, not %r" % type(s))
+        s = _PackratInput(s, max_memo_entries)
+    return p(s, i)
+
+
+def parse_many(p, source, chunk_size=2**16, encoding="utf-8"):
+    """Yields the values of successive parsings of `source` by `p`.
+
+    Like `Many(p)`, this takes the first parsing each time, but it yields
+    each value as soon as it's parsed and forgets the input before it, so
+    `source` can be far larger than memory.  See `StreamInput` for the
+    kinds of `source`.  Raises ValueError if `p` stops matching, or stops
+    consuming input, before the end.
+
+    """
+    s = StreamInput(source, chunk_size, encoding)
+    i = 0
+    while s[i : i + 1]:
+        for v, j in p(s, i):
+            break
+        else:
+            raise ValueError("no parsing at position %d" % i)
+        if j == i:
+            raise ValueError("parsing consumed no input at position %d" % i)
+        s.commit(j)
+        i = j
+        yield v
+
+
+class StreamInput(object):
+    """Input for parsers that is read from `source` as parsers need it.
+
+    `source` may be a string, a file or mmap (whose `read` returns strings
+    or bytes), or an iterable of string or bytes chunks.  Bytes are decoded
+    as `encoding`.  Parsers see the input as a string that they can index,
+    slice and call `startswith` on, at positions counted from its start.
+
+    Only the input from the last commit point on is kept in memory: call
+    `commit(i)` once no parser can backtrack to before position `i`.
+    Compiled parsers need string input.
+
+    """
+
+    def __init__(self, source, chunk_size=2**16, encoding="utf-8"):
+        if isinstance(source, (str, bytes)):
+            chunks = iter([source])
+        elif hasattr(source, "read"):
+            chunks = iter(lambda: source.read(chunk_size), source.read(0))
+        else:
+            chunks = iter(source)
+        self.chunks = chunks
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.buffer = ""
+        self.offset = 0  # The position of buffer[0] in the input
+        self.committed = 0
+
+    def commit(self, i):
+        """Forgets the input before position `i`."""
+        self.committed = max(self.committed, i)
+
+    def startswith(self, prefix, i):
+        return self[i : i + len(prefix)] == prefix
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            start, stop = k.start or 0, k.stop
+            if stop is None or k.step is not None:
+                raise IndexError("unsupported slice %r of StreamInput" % k)
+            self._read_to(stop)
+            if start < self.offset:
+                raise IndexError("position %d has been committed" % start)
+            return self.buffer[start - self.offset : stop - self.offset]
+        self._read_to(k + 1)
+        if k < self.offset:
+            raise IndexError("position %d has been committed" % k)
+        return self.buffer[k - self.offset]
+
+    def _read_to(self, stop):
+        """Reads input until the buffer holds position `stop - 1`."""
+        while stop > self.offset + len(self.buffer):
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self.buffer += self.decoder.decode(b"", final=True)
+                self.chunks = iter(())
+                return
+            if isinstance(chunk, (bytes, bytearray)):
+                chunk = self.decoder.decode(chunk)
+            # Trim committed input once it's most of the buffer, so that
+            # trimming takes amortized constant time per character.
+            trim = self.committed - self.offset
+            if trim > len(self.buffer) // 2:
+                self.buffer = self.buffer[trim:]
+                self.offset = self.committed
+            self.buffer += chunk
+
+
+class _PackratInput(str):
+    """An input string that carries the state of a packrat parse."""
+
+    def __new__(cls, s, max_memo_entries):
+        self = str.__new__(cls, s)
+        self.memo = collections.OrderedDict()  # (rule, i) -> results
+        self.max_memo_entries = max_memo_entries
+        self.active = {}  # (rule, i) -> _RuleApplication, for rules in progress
+        self.stack = []  # Rule applications in progress, innermost last
+        self.growing = 0  # Count of left-recursive rules growing their seeds
+        return self
+
+
+class _RuleApplication(object):
+    """The state of a rule being applied at a position."""
+
+    def __init__(self):
+        self.seed = ()
+        self.left_recursive = False
+        self.growing = False
+        self.memoizable = True
+
+
+def _furthest(results):
+    return max((i for _, i in results), default=-1)
+
+
+def compile(p):
+    """Compiles `p` into a parser that matches the same strings, faster.
+
+    The compiled parser yields the same parsings `(v, i')` in the same
+    order as `p` does.  Rather than nesting a generator per combinator, it
+    runs a flat array of instructions in a single loop with an explicit
+    backtracking stack, in the style of a parsing machine.  A sequence of
+    `Char`s becomes one `str.startswith` test, a `Choice` of `Char`s one
+    set lookup, and `Many` or `Many1` of those one regular expression
+    match.  Parsers other than those defined here are called as they are.
+
+    Rules are compiled into subroutines, but compiled parsers do no packrat
+    parsing, so left-recursive rules never terminate.
+
+    Reference: Medeiros, S. and Ierusalimschy, R. A parsing machine for
+    PEGs. DLS 2008.
+
+    """
+    return CompiledParser(p)
+
+
+class CompiledParser(Parser):
+    """Matches what `p` does by running `p` compiled to instructions."""
+
+    def __init__(self, p):
+        self.parser = p
+        self.code = _Compiler().compile(p)
+
+    def __call__(self, s, i):
+        return _run(self.code, s, i)
+
+
+# Instructions, each a pair `(op, arg)`.
+_CHAR = 0  # Match the character `arg`.
+_STRING = 1  # Match the string `arg[0]`, with value `arg[1]`.
+_SET = 2  # Match any character in the set `arg`.
+_SPAN = 3  # Match `arg[1]` or more characters with `arg[0]`, a regex.
+_BIND = 4  # Pair the two topmost values.
+_CHOICE = 5  # Save a backtrack entry to try `arg` if what follows fails.
+_CHOICE_DONE = 6  # The first option succeeded, so disable its backtrack entry.
+_JUMP = 7  # Continue at `arg`.
+_MANY_BEGIN = 8  # Push a list to collect values in.
+_MANY_TRY = 9  # Save a backtrack entry to go to `arg` if what follows fails.
+_MANY_NEXT = 10  # Collect a value, drop entries since _MANY_TRY, go to `arg`.
+_MANY_END = 11  # Fail if fewer than `arg` values were collected.
+_CALL = 12  # Call the subroutine at `arg`.
+_RETURN = 13  # Return from a subroutine.
+_FOREIGN = 14  # Call parser `arg`, saving the rest of its results to backtrack.
+_FAIL = 15  # Fail.
+_END = 16  # Yield a parsing.
+
+
+class _Compiler(object):
+    def __init__(self):
+        self.code = []
+        self.rules = {}  # Rule -> the address of its subroutine
+        self.calls = []  # (address of a _CALL, its Rule), to fill in
+
+    def compile(self, p):
+        self.emit(p)
+        self.code.append((_END, None))
+        while self.calls:
+            address, rule = self.calls.pop()
+            if rule not in self.rules:
+                self.rules[rule] = len(self.code)
+                self.emit(rule.p)
+                self.code.append((_RETURN, None))
+            self.code[address] = (_CALL, self.rules[rule])
+        return self.code
+
+    def emit(self, p):
+        code = self.code
+        kind = type(p)
+        literal = _literal(p)
+        if literal is not None and len(literal[0]) > 1:
+            code.append((_STRING, literal))
+        elif kind is Char:
+            code.append((_CHAR, p.c))
+        elif _char_set(p) is not None:
+            code.append((_SET, frozenset(_char_set(p))))
+        elif kind is Bind:
+            self.emit(p.p1)
+            self.emit(p.p2)
+            code.append((_BIND, None))
+        elif kind is Choice:
+            choice = len(code)
+            code.append(None)
+            self.emit(p.p1)
+            code.append((_CHOICE_DONE, None))
+            jump = len(code)
+            code.append(None)
+            code[choice] = (_CHOICE, len(code))
+            self.emit(p.p2)
+            code[jump] = (_JUMP, len(code))
+        elif kind is Many or kind is Many1:
+            minimum = 1 if kind is Many1 else 0
+            chars = _char_set(p.p)
+            if chars is not None:
+                regex = re.compile("[%s]*" % "".join(map(re.escape, sorted(chars))))
+                code.append((_SPAN, (regex, minimum)))
+            else:
+                code.append((_MANY_BEGIN, None))
+                loop = len(code)
+                code.append(None)
+                self.emit(p.p)
+                code.append((_MANY_NEXT, loop))
+                code[loop] = (_MANY_TRY, len(code))
+                code.append((_MANY_END, minimum))
+        elif kind is Zero:
+            code.append((_FAIL, None))
+        elif kind is Rule:
+            self.calls.append((len(code), p))
+            code.append(None)
+        elif kind is CompiledParser:
+            self.emit(p.parser)
+        else:
+            code.append((_FOREIGN, p))
+
+
+def _literal(p):
+    """Returns `(t, v)` if `p` matches just the string `t`, with value `v`."""
+    kind = type(p)
+    if kind is Char and len(p.c) == 1:
+        return p.c, p.c
+    if kind is Bind:
+        literal1 = _literal(p.p1)
+        literal2 = literal1 and _literal(p.p2)
+        if literal2:
+            return literal1[0] + literal2[0], (literal1[1], literal2[1])
+    return None
+
+
+def _char_set(p):
+    """Returns the characters `p` matches if it matches just one of a set."""
+    kind = type(p)
+    if kind is Char and len(p.c) == 1:
+        return {p.c}
+    if kind is Choice:
+        chars1 = _char_set(p.p1)
+        chars2 = chars1 and _char_set(p.p2)
+        if chars2:
+            return chars1 | chars2
+    return None
+
+
+def _run(code, s, i):
+    """Yields the parsings of `s` from position `i` by compiled `code`.
+
+    The machine's values and frames are linked lists of pairs `(head, tail)`,
+    so that backtrack entries can save them in constant time.  Frames hold
+    _CHOICE backtrack entries, _MANY_TRY stack heights and return addresses.
+
+    """
+    n = len(s)
+    stack = []  # Backtrack entries [address, i, values, frames, results]
+    values = frames = None
+    pc = 0
+    while True:
+        op, arg = code[pc]
+        if op == _CHAR:
+            if i < n and s[i] == arg:
+                values = (arg, values)
+                i += 1
+                pc += 1
+                continue
+        elif op == _STRING:
+            if s.startswith(arg[0], i):
+                values = (arg[1], values)
+                i += len(arg[0])
+                pc += 1
+                continue
+        elif op == _SET:
+            if i < n and s[i] in arg:
+                values = (s[i], values)
+                i += 1
+                pc += 1
+                continue
+        elif op == _BIND:
+            v2, values = values
+            v1, values = values
+            values = ((v1, v2), values)
+            pc += 1
+            continue
+        elif op == _SPAN:
+            j = arg[0].match(s, i).end()
+            if j - i >= arg[1]:
+                values = (list(s[i:j]), values)
+                i = j
+                pc += 1
+                continue
+        elif op == _CHOICE:
+            entry = [arg, i, values, frames, None]
+            stack.append(entry)
+            frames = (entry, frames)
+            pc += 1
+            continue
+        elif op == _CHOICE_DONE:
+            entry, frames = frames
+            entry[0] = None
+            pc += 1
+            continue
+        elif op == _JUMP:
+            pc = arg
+            continue
+        elif op == _MANY_BEGIN:
+            values = ([], values)
+            pc += 1
+            continue
+        elif op == _MANY_TRY:
+            frames = (len(stack), frames)
+            stack.append([arg, i, values, frames[1], None])
+            pc += 1
+            continue
+        elif op == _MANY_NEXT:
+            v, values = values
+            values[0].append(v)
+            height, frames = frames
+            del stack[height:]
+            pc = arg
+            continue
+        elif op == _MANY_END:
+            if len(values[0]) >= arg:
+                pc += 1
+                continue
+        elif op == _CALL:
+            frames = (pc + 1, frames)
+            pc = arg
+            continue
+        elif op == _RETURN:
+            pc, frames = frames
+            continue
+        elif op == _FOREIGN:
+            results = iter(arg(s, i))
+            result = next(results, None)
+            if result is not None:
+                stack.append([pc + 1, i, values, frames, results])
+                v, i = result
+                values = (v, values)
+                pc += 1
+                continue
+        elif op == _END:
+            yield values[0], i
+        # Fail: backtrack to the most recent live entry.
+        while stack:
+            entry = stack[-1]
+            pc, i, values, frames, results = entry
+            if results is None:
+                stack.pop()
+                if pc is not None:
+                    break
+            else:
+                result = next(results, None)
+                if result is None:
+                    stack.pop()
+                else:
+                    v, i = result
+                    values = (v, values)
+                    break
+        else:
+            return
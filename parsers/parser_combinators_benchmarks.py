@@ -0,0 +1,62 @@
+#!/usr/bin/python
+
+"""Benchmarks for `parser_combinators`.
+
+Usage:    python parser_combinators_benchmarks.py
+
+"""
+
+import timeit
+
+from parser_combinators import Char, Many, Many1, Rule, compile
+
+
+def timed(f, *args):
+    """Call f(*args) once and return the elapsed time in seconds."""
+    return timeit.timeit(lambda: f(*args), number=1)
+
+
+def csv_grammar():
+    digit = Char("0")
+    for c in "123456789":
+        digit = digit | Char(c)
+    number = Many1(digit)
+    row = number + Many(Char(",") + Char(" ") + number) + Char("\n")
+    return Many(row)
+
+
+def expression_grammar():
+    expr = Rule()
+    term = Rule(Char("(") + expr + Char(")") | Char("x"))
+    expr.define(term + Many(Char("+") + term))
+    return expr
+
+
+def keyword_grammar():
+    keyword = Char("w") + Char("h") + Char("i") + Char("l") + Char("e")
+    return Many(keyword + Char(" ") | Char("x") + Char(" "))
+
+
+def bench_compile():
+    """Compare interpreted and compiled parsers on inputs of about 10^5 chars."""
+    print("parsing: seconds")
+    print("  %-12s %12s %12s" % ("grammar", "interpreted", "compiled"))
+    cases = [
+        ("csv", csv_grammar(), "123, 45, 6789, 0\n" * 6000),
+        ("expression", expression_grammar(), "+".join(["((x+x)+(x+x))"] * 8000)),
+        ("keywords", keyword_grammar(), "while x " * 12000),
+    ]
+    for name, p, s in cases:
+        compiled = compile(p)
+        assert list(compiled(s, 0)) == list(p(s, 0))
+        interpreted = timed(lambda: list(p(s, 0)))
+        by_compiled = timed(lambda: list(compiled(s, 0)))
+        print("  %-12s %12.4f %12.4f" % (name, interpreted, by_compiled))
+
+
+def main():
+    bench_compile()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
-from parser_combinators import Char, Zero, Many, Many1
+import io
+
+import pytest
+
+from parser_combinators import Char, Zero, Many, Many1, Parser, Rule, StreamInput
+from parser_combinators import compile, parse, parse_many
 
 
 def test_char():
@@ -63,3 +68,161 @@ def test_many1():
     p = Many1(Char("a") | Char("b"))
     assert list(p("abababc", 0)) == [(["a", "b", "a", "b", "a", "b"], 6)]
     assert list(p("cde", 0)) == []
+
+
+def test_rule():
+    p = Rule(Char("a") + Char("b"))
+    assert list(p("abc", 0)) == [(("a", "b"), 2)]
+    assert list(parse(p, "abc", packrat=True)) == [(("a", "b"), 2)]
+    # Rules tie together recursive grammars.
+    parens = Rule()
+    parens.define(Char("(") + parens + Char(")") | Char("x"))
+    assert list(parse(parens, "((x))")) == [((("(", (("(", "x"), ")")), ")"), 5)]
+    assert list(parse(parens, "((x))", packrat=True)) == list(parse(parens, "((x))"))
+
+
+def test_packrat_parsing_memoizes_rules():
+    calls = []
+
+    class Counted(Parser):
+        def __init__(self, p):
+            self.p = p
+
+        def __call__(self, s, i):
+            calls.append(i)
+            return self.p(s, i)
+
+    # Both alternatives start with `a`, so backtracking re-parses it.
+    a = Rule(Counted(Many1(Char("a"))))
+    p = a + Char("b") | a + Char("c")
+    expected = [((["a", "a"], "c"), 3)]
+    assert list(parse(p, "aac")) == expected
+    assert calls == [0, 0]
+    calls[:] = []
+    assert list(parse(p, "aac", packrat=True)) == expected
+    assert calls == [0]
+
+
+def test_packrat_parsing_bounds_its_memo_table():
+    s = "a" * 100
+    a = Rule(Char("a"))
+    p = Many(a)
+    state = []
+
+    class Spy(Parser):
+        def __call__(self, s, i):
+            state.append(len(s.memo))
+            yield None, i
+
+    assert list(parse(p + Spy(), s, packrat=True, max_memo_entries=10)) == [
+        ((["a"] * 100, None), 100)
+    ]
+    assert state == [10]
+
+
+def test_packrat_parsing_supports_left_recursion():
+    # Direct left recursion: expr <- expr "+" "1" / "1"
+    expr = Rule()
+    expr.define(expr + Char("+") + Char("1") | Char("1"))
+    assert list(parse(expr, "1+1+1", packrat=True)) == [
+        ((((("1", "+"), "1"), "+"), "1"), 5)
+    ]
+    assert list(parse(expr, "1+", packrat=True)) == [("1", 1)]
+    assert list(parse(expr, "+", packrat=True)) == []
+    # Indirect left recursion: x <- y "b" / "a";  y <- x "c"
+    x = Rule()
+    y = Rule(x + Char("c"))
+    x.define(y + Char("b") | Char("a"))
+    assert list(parse(x, "acbcb", packrat=True)) == [
+        ((((((("a", "c"), "b"), "c"), "b"))), 5)
+    ]
+
+
+def test_compile():
+    class Prefixes(Parser):
+        """Matches each nonempty prefix of the rest of the input."""
+
+        def __call__(self, s, i):
+            for j in range(i + 1, len(s) + 1):
+                yield s[i:j], j
+
+    digit = Char("0") | Char("1") | Char("2")
+    parens = Rule()
+    parens.define(Char("(") + parens + Char(")") | Char("x"))
+    parsers = [
+        Char("a"),
+        Zero(),
+        Char("a") + Char("b") + Char("c"),
+        Char("a") + (Char("b") + Char("c")),
+        Char("a") | Char("b") + Char("c") | Zero(),
+        Many(Char("a") | Char("b")),
+        Many1(digit) + Many(Char(",") + Many1(digit)),
+        Many(Char("a") + Char("b") | Char("a")),
+        Many1(Char("a") + Char("b")),
+        parens,
+        Prefixes() + Prefixes(),
+        Many(Char("a") + Prefixes()),
+        (Prefixes() | Char("b")) + Char("b"),
+    ]
+    for p in parsers:
+        compiled = compile(p)
+        for s in ["", "a", "abc", "abab", "aaba", "bcb", "0,12,2", "((x))", "(x"]:
+            for i in range(len(s) + 1):
+                assert list(compiled(s, i)) == list(p(s, i))
+    # Compiled parsers combine with others.
+    p = compile(Char("a") + Char("b")) | Char("c")
+    assert list(p("cab", 0)) == [("c", 1)]
+    assert list(compile(p)("abc", 0)) == [(("a", "b"), 2)]
+
+
+def test_stream_input():
+    s = StreamInput(iter(["ab", "c", "", "de"]))
+    assert s[0] == "a"
+    assert s[1:4] == "bcd"
+    assert s.startswith("cde", 2)
+    assert not s.startswith("def", 3)
+    assert s[4:10] == "e"
+    with pytest.raises(IndexError):
+        s[5]
+    p = Char("a") + Char("b") + Char("c")
+    assert list(p(s, 0)) == [((("a", "b"), "c"), 3)]
+    # Bytes are decoded, even when chunks split characters.
+    s = StreamInput(iter([b"\xc3", b"\xa9t\xc3", b"\xa9"]))
+    assert s[0:3] == "\xe9t\xe9"
+    s = StreamInput(io.BytesIO("\xe9t\xe9".encode("utf-8")), chunk_size=1)
+    assert s[0:3] == "\xe9t\xe9"
+
+
+def test_stream_input_forgets_committed_input():
+    s = StreamInput(io.StringIO("abcdefgh" * 100), chunk_size=8)
+    for i in range(0, 800, 8):
+        assert s[i : i + 8] == "abcdefgh"
+        s.commit(i + 8)
+        assert len(s.buffer) <= 32
+    with pytest.raises(IndexError):
+        s[0]
+
+
+def test_packrat_parsing_rejects_stream_input():
+    with pytest.raises(TypeError):
+        list(parse(Rule(Char("a")), StreamInput("abc"), packrat=True))
+    assert list(parse(Rule(Char("a")), StreamInput("abc"))) == [("a", 1)]
+
+
+def test_parse_many():
+    digit = Char("0") | Char("1") | Char("2")
+    line = Many1(digit) + Char("\n")
+    source = io.StringIO("01\n2\n" * 1000)
+    lines = parse_many(line, source, chunk_size=7)
+    assert next(lines) == (["0", "1"], "\n")
+    assert next(lines) == (["2"], "\n")
+    assert len(list(lines)) == 1998
+    assert list(parse_many(line, iter([b"1", b"2\n0\n"]))) == [
+        (["1", "2"], "\n"),
+        (["0"], "\n"),
+    ]
+    assert list(parse_many(line, "")) == []
+    with pytest.raises(ValueError):
+        list(parse_many(line, "12\n3\n"))
+    with pytest.raises(ValueError):
+        list(parse_many(Many(digit), "12\n"))
@@ -63,20 +63,7 @@ import functools
 import sys
 
 
-def memoize(f):
-    cache = {}
-
-    @functools.wraps(f)
-    def newfunc(*args):
-        args = tuple(args)
-        if args not in cache:
-            cache[args] = f(*args)
-        return cache[args]
-
-    return newfunc
-
-
-@memoize
+@functools.lru_cache(maxsize=2**20)
 def worst_case_trial_count(floors, eggs):
     if eggs == 1 or floors < 2:
         return floors